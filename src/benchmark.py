@@ -0,0 +1,195 @@
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import numpy as np
+from datetime import datetime
+
+from console_bot import ConsoleWordleBot
+from game import Game
+from words import WORDBANK, POSS_ANSWERS
+from feedback import load_matrix, wordbank_hash
+from utils import check_guess, word_matches_guess, find_poss_words, new_guess
+
+SIZES = [10, 100, 1000, len(WORDBANK)]
+N_GAMES = 100
+SEED = 0
+
+
+def best_time(func, repeat = 5, min_time = 0.2):
+    """
+    This method times a function the way timeit does. The function is
+    called in a loop until the loop takes at least min_time, and the
+    fastest of several such loops is used
+
+    Parameters
+    ----------
+    func:       function
+                function with no arguments to time
+    repeat:     int
+                number of loops to take the fastest of
+    min_time:   float
+                shortest loop in seconds
+
+    Returns
+    -------
+    seconds:    float
+                seconds per call
+    """
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        number *= 2
+    best = elapsed
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, time.perf_counter() - start)
+    return best / number
+
+
+def run(sizes = SIZES, n_games = N_GAMES, repeat = 5):
+    """
+    This method times the solver's hot paths at each candidate set size,
+    and full games on a fixed sample of answers
+
+    Parameters
+    ----------
+    sizes:      list
+                candidate set sizes to time at
+    n_games:    int
+                number of answers in the game sample
+    repeat:     int
+                number of loops to take the fastest of
+
+    Returns
+    -------
+    results:    dict
+                {'meta', 'results'} where results maps each benchmark to seconds per call
+    """
+    rng = random.Random(SEED)
+    wordbank = WORDBANK.words
+    answers = rng.sample(POSS_ANSWERS.words, n_games)
+    load_matrix()
+    results = {}
+    for size in sizes:
+        words = rng.sample(wordbank, size)
+        guess = rng.choice(wordbank)
+        code = check_guess(guess, words[0])
+        results[f"check_guess[n={size}]"] = best_time(lambda: [check_guess(guess, word) for word in words], repeat)
+        results[f"word_matches_guess[n={size}]"] = best_time(lambda: [word_matches_guess(word, guess, code) for word in words], repeat)
+        results[f"find_poss_words[n={size}]"] = best_time(lambda: find_poss_words(guess, code, words, []), repeat)
+        results[f"new_guess[n={size}]"] = best_time(lambda: new_guess(words, words, [], []), repeat)
+
+    def play_games(memo):
+        bot = ConsoleWordleBot("slate", memo = memo)
+        for answer in answers:
+            bot.play_game(Game(answer))
+
+    results[f"play_game[games={n_games}]"] = best_time(lambda: play_games(None), repeat) / n_games
+    return {'meta' : {'date' : datetime.now().isoformat(timespec = 'seconds'),
+                        'python' : platform.python_version(),
+                        'numpy' : np.__version__,
+                        'machine' : platform.platform(),
+                        'wordbank' : wordbank_hash(),
+                        'seed' : SEED},
+            'results' : results}
+
+
+def compare(baseline, current, threshold = 0.1):
+    """
+    This method compares two benchmark runs and prints the change of each benchmark
+
+    Parameters
+    ----------
+    baseline:   dict
+                results of the run to compare against
+    current:    dict
+                results of the new run
+    threshold:  float
+                slowdown, as a fraction, above which a benchmark is a regression
+
+    Returns
+    -------
+    regressions:    list
+                    names of the benchmarks that got slower than the threshold
+    """
+    regressions = []
+    print(f"{'benchmark':<32}{'baseline':>14}{'current':>14}{'change':>10}")
+    for name, seconds in current['results'].items():
+        if name not in baseline['results']:
+            print(f"{name:<32}{'-':>14}{format_time(seconds):>14}{'new':>10}")
+            continue
+        ratio = seconds / baseline['results'][name]
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:<32}{format_time(baseline['results'][name]):>14}{format_time(seconds):>14}{(ratio - 1) * 100:>+9.1f}%{flag}")
+    return regressions
+
+
+def format_time(seconds):
+    """This method formats seconds per call with a readable unit"""
+    for unit, scale in [("s", 1), ("ms", 1e-3), ("us", 1e-6)]:
+        if seconds >= scale:
+            return f"{seconds / scale:.3f} {unit}"
+    return f"{seconds / 1e-9:.1f} ns"
+
+
+def display(results):
+    """This method prints the results of a benchmark run"""
+    for name, seconds in results['results'].items():
+        print(f"{name:<32}{format_time(seconds):>14}")
+        if name.startswith("play_game"):
+            print(f"{'games per second':<32}{1 / seconds:>14.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description = "Benchmark the solver's hot paths")
+    subparsers = parser.add_subparsers(dest = "command", required = True)
+    run_parser = subparsers.add_parser("run", help = "time the benchmarks and save them")
+    run_parser.add_argument("--out", default = None, help = "json file to save the results to")
+    run_parser.add_argument("--compare", default = None, help = "baseline json file to compare against")
+    run_parser.add_argument("--threshold", type = float, default = 0.1, help = "slowdown flagged as a regression, i.e. 0.1 for 10%%")
+    run_parser.add_argument("--games", type = int, default = N_GAMES, help = "number of games in the game sample")
+    run_parser.add_argument("--repeat", type = int, default = 5, help = "number of loops to take the fastest of")
+    compare_parser = subparsers.add_parser("compare", help = "compare two saved runs")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type = float, default = 0.1, help = "slowdown flagged as a regression, i.e. 0.1 for 10%%")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        results = run(n_games = args.games, repeat = args.repeat)
+        display(results)
+        if args.out:
+            with open(args.out, 'w') as outfile:
+                json.dump(results, outfile, indent = 4)
+            print(f"\nSaved to {args.out}")
+        if not args.compare:
+            return
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        print()
+    else:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        with open(args.current) as file:
+            results = json.load(file)
+    regressions = compare(baseline, results, args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) above {args.threshold * 100:.0f}%")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+import os
+import sys
+import json
+import hashlib
+import numpy as np
+from datetime import datetime
+
+from words import WORDBANK, write_atomic
+from feedback import ALL_CORRECT, load_matrix, wordbank_hash
+from candidates import all_candidates
+from utils import SOLVER_SETTINGS, rank_candidates
+from memo import GuessMemo
+
+BOOK_DIR = os.path.dirname(os.path.abspath(__file__))
+
+_books = {}
+
+
+def book_version(settings = SOLVER_SETTINGS):
+    """
+    This method returns the version an opening book is stored under. It
+    changes whenever the word bank or the solver settings change
+
+    Parameters
+    ----------
+    settings:   dict
+                solver settings
+
+    Returns
+    -------
+    version:    str
+                short hash of the word bank and settings
+    """
+    settings_str = json.dumps(settings, sort_keys = True)
+    return hashlib.sha1(f"{wordbank_hash()}|{settings_str}".encode()).hexdigest()[:16]
+
+
+def book_filename(first_guess, directory = BOOK_DIR):
+    """This method returns where the opening books of a first guess are saved, next to the word lists"""
+    return os.path.join(directory, f"book_{first_guess}.json")
+
+
+def build_book(first_guess, settings = SOLVER_SETTINGS, memo = None):
+    """
+    This method finds the bot's second guess for every feedback pattern
+    the first guess can give, the same way the bots find it. Every word
+    in the word bank is a candidate, so a book does not change as
+    previous answers are added, see book_guess
+
+    Parameters
+    ----------
+    first_guess:    str
+                    first guess, which must be in the word bank
+    settings:       dict
+                    solver settings
+    memo:           GuessMemo
+                    cache of guess decisions, a new one is used if not given
+
+    Returns
+    -------
+    book:           dict
+                    {pattern code : second guess}
+    """
+    if first_guess not in WORDBANK.index:
+        raise ValueError(f"{first_guess} is not in the word bank")
+    if memo is None:
+        memo = GuessMemo()
+    candidates = all_candidates()
+    codes = load_matrix()[WORDBANK.index[first_guess]][candidates]
+    book = {}
+    for code in np.unique(codes).tolist():
+        if code == ALL_CORRECT:
+            continue
+        ranked_idx, _ = rank_candidates(candidates[codes == code], [first_guess], [], memo, settings = settings)
+        if len(ranked_idx):
+            book[code] = WORDBANK.words[ranked_idx[0]]
+    return book
+
+
+def load_book(first_guess, settings = SOLVER_SETTINGS, directory = BOOK_DIR, keep = 4, build = True):
+    """
+    This method returns the opening book of a first guess. Books are read
+    from disk the first time they are needed, and built and saved if the
+    saved book is missing or was built for a different word bank or different
+    solver settings. The file keeps the most recently built books so that
+    bots with different settings do not rebuild each other's
+
+    Parameters
+    ----------
+    first_guess:    str
+                    first guess, which must be in the word bank
+    settings:       dict
+                    solver settings
+    directory:      str
+                    directory the book is saved in
+    keep:           int
+                    number of books kept in the file
+    build:          bool
+                    false to return None instead of building a missing book
+
+    Returns
+    -------
+    book:           dict
+                    {pattern code : second guess}
+    """
+    version = book_version(settings)
+    filename = book_filename(first_guess, directory)
+    if (filename, version) in _books:
+        return _books[filename, version]
+    books = {}
+    if os.path.exists(filename):
+        try:
+            with open(filename) as file:
+                books = json.load(file)
+        except ValueError:
+            books = {}
+    if version in books:
+        book = {int(code) : guess for code, guess in books[version]['book'].items()}
+    elif not build:
+        return None
+    else:
+        book = build_book(first_guess, settings)
+        books[version] = {'built' : datetime.now().isoformat(timespec = 'seconds'),
+                            'settings' : settings,
+                            'book' : book}
+        newest = sorted(books, key = lambda key: books[key]['built'], reverse = True)[:keep]
+        books = {key : books[key] for key in newest}
+        write_atomic(filename, json.dumps(books, indent = 1))
+    _books[filename, version] = book
+    return book
+
+
+def book_guess(book, code, exclude = ()):
+    """
+    This method looks up the second guess for a pattern of the first guess
+
+    Parameters
+    ----------
+    book:       dict
+                opening book from load_book, or None
+    code:       int
+                pattern code of the first guess
+    exclude:    iterable
+                words that cannot be the answer, i.e. previous answers
+
+    Returns
+    -------
+    guess:      str
+                second guess, or None if there is no book, no entry for the
+                pattern or the entry is an excluded word
+    """
+    if book is None:
+        return None
+    guess = book.get(code)
+    return None if guess in exclude else guess
+
+
+def main():
+    for first_guess in sys.argv[1:]:
+        book = load_book(first_guess)
+        print(f"{first_guess}: {len(book)} patterns, saved to {book_filename(first_guess)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,39 +1,48 @@
 import os
 import time
-import json
 import warnings
 import numpy as np
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.common.keys import Keys
 
 from words import WORDBANK, PREV_ANSWERS
-from utils import find_poss_words, new_guess, guessed_word, color_dict, time_until_end_of_today
+from utils import SOLVER_SETTINGS, best_guess, guessed_word, time_until_end_of_today
+from feedback import render_pattern
+from candidates import all_candidates, filter_candidates
+from store import SolverStore
+from book import load_book, book_guess
+from gamelog import LOG_FILE, GameLog
+from game import new_game
 from twitter import tweet, update_bio
 
 warnings.filterwarnings("ignore")
-options = webdriver.ChromeOptions()
-options.add_experimental_option('excludeSwitches', ['enable-logging'])
-driver = webdriver.Chrome(executable_path = "C:\Program Files (x86)\chromedriver.exe", service_log_path='NUL', options = options)
-url = "https://www.nytimes.com/games/wordle/"
-driver.get(url)
-time.sleep(1)
 
 
 class WordleBot:
     """
     This class represents the bot that plays wordle
-    Its data is stored in a json file and its first guess is
+    Its games are logged to a json lines file, see gamelog.py,
+    with the games of an older data.json file migrated into it,
+    and its first guess is
     given by the mathematically optimal first word; soare
     The current wordle should be set to whatever wordle the 
-    previous days wordle was
+    previous days wordle was. A time budget, in seconds, caps
+    how long each guess may take to pick, and solver settings, i.e.
+    {'corpus' : 'wordbank'} for normal mode, override utils.SOLVER_SETTINGS
+    The second guess is looked up in the opening book of the first guess
+    It plays on the Wordle page through the 'browser' backend by default,
+    see game.new_game for the others and backend_options for their arguments
     """
-    def __init__(self, filename = "data.json", first_guess = "slate", cur_wordle = 0, tweet = False):
+    def __init__(self, filename = "data.json", first_guess = "slate", cur_wordle = 0, tweet = False, store = None, time_budget = None, settings = None, log_file = LOG_FILE, backend = 'browser', backend_options = None):
         self.filename = filename
         self.first_guess = first_guess
         self.cur_wordle = cur_wordle
         self.tweet = tweet
-        self.data = json.load(open(self.filename, encoding="utf-8"))
+        self.log = GameLog(log_file, legacy_file = filename)
+        self.store = store if store is not None else SolverStore()
+        self.time_budget = time_budget
+        self.settings = {**SOLVER_SETTINGS, **(settings or {})}
+        self.use_book = first_guess in WORDBANK.index
+        self.backend = backend
+        self.backend_options = backend_options or {}
 
     def run(self):
         """
@@ -58,23 +67,33 @@ class WordleBot:
         for the next guess. It then writes out information
         about the game to the file
         """
+        self.game = new_game(self.backend, **self.backend_options)
         guess = self.first_guess
         guesses = 0
         prev_guesses = []
         prev_guess_results = []
-        poss_words = WORDBANK
+        candidates = all_candidates(exclude = PREV_ANSWERS)
         while guesses < 6:
             guesses += 1
-            guess_results = self._guess(guess)
+            code = self._guess(guess)
             prev_guesses.append(guess)
-            prev_guess_results.append(guess_results)
-            if guessed_word(guess_results):
+            prev_guess_results.append(code)
+            if guessed_word(code):
                 PREV_ANSWERS.add(guess)
                 self._update_prev_answers_file(guess)
                 self._write_out(prev_guesses, prev_guess_results, True)
                 return
-            poss_words = find_poss_words(guess, guess_results, poss_words, PREV_ANSWERS)
-            guess = new_guess(poss_words, poss_words, prev_guesses, PREV_ANSWERS)
+            candidates = filter_candidates(guess, code, candidates)
+            if guesses == 1 and self.use_book:
+                # with a time budget only a book built ahead of time is used, building one takes longer than any single guess
+                second_guess = book_guess(load_book(self.first_guess, self.settings, build = self.time_budget is None), code, PREV_ANSWERS)
+                if second_guess is not None:
+                    guess = second_guess
+                    continue
+            info = {}
+            guess = best_guess(candidates, prev_guesses, PREV_ANSWERS, store = self.store, info = info, time_budget = self.time_budget, settings = self.settings)
+            if info['evaluated'] < 1:
+                print(f"Scored {round(info['evaluated'] * 100, 1)}% of {info['corpus_size']} guesses within the {self.time_budget} second budget")
         self._write_out(prev_guesses, prev_guess_results, False)
 
     def _update_prev_answers_file(self, guess):
@@ -85,7 +104,7 @@ class WordleBot:
 
     def _write_out(self, prev_guesses, prev_guess_results, won):
         """
-        This method writes out the game data to a file
+        This method appends the game to the game log
 
         Parameters
         ----------
@@ -94,26 +113,14 @@ class WordleBot:
         won:            bool
                         true if game was won
         """
-        key = "wordle_" + str(self.cur_wordle)
-        data = self.data['data']
         game_data = {}
+        game_data['wordle'] = "wordle_" + str(self.cur_wordle)
         game_data['won'] = won
-        for i, (guess, _eval) in enumerate(zip(prev_guesses, prev_guess_results)):
+        game_data['num_guesses'] = len(prev_guesses)
+        for i, (guess, code) in enumerate(zip(prev_guesses, prev_guess_results)):
             game_data[f'guess_{i+1}'] = guess
-            game_data[f'eval_{i+1}'] = "".join([color_dict[evaluation] for evaluation in _eval])
-        data['game_history'][key] = game_data
-        data['games_played'] = len(data['game_history'])
-        if won:
-            data['cur_streak'] = self._calc_cur_streak(data)
-        else:
-            data['cur_streak'] = 0
-        data['max_streak'] = max(data['max_streak'], data['cur_streak'])
-        data['win_rate'] = self._calc_win_rate(data)
-
-        json_string = json.dumps({"data" : data}, indent = 4, ensure_ascii=False)
-        with open(self.filename, 'w', encoding="utf-8") as outfile:
-            outfile.write(json_string)
-        self.data = json.load(open(self.filename, encoding="utf-8"))
+            game_data[f'eval_{i+1}'] = render_pattern(code)
+        self.log.append(game_data)
         if self.tweet:
             self._tweet(prev_guess_results)
         self._display_stats()
@@ -123,8 +130,8 @@ class WordleBot:
         This method tweets the bots results
         """
         string = f"Wordle {self.cur_wordle}\n\n"
-        for _eval in guess_results:
-            string += "".join([color_dict[evaluation] for evaluation in _eval]) + "\n"
+        for code in guess_results:
+            string += render_pattern(code) + "\n"
         tweet(string)
         self._update_bio()
 
@@ -132,17 +139,9 @@ class WordleBot:
         """
         This method updates the bots Twitter bio
         """
-        data = self.data['data']
-        games_played = data['games_played']
-        max_streak = data['max_streak']
-        total_guesses = 0 
-        games = 0
-        for game in list(data['game_history'].values()):
-            if game['won']:
-                total_guesses += len(game) // 2
-                games += 1
-        avg = round(total_guesses / games, 2)
-        string = f"I'm a bot that plays Wordle. I've played {games_played} games and average {avg} guesses per game. My longest streak is {max_streak}. Code - http://github.com/cezar-r/wordle"
+        stats = self.log.stats
+        avg = round(self.log.avg_guesses(), 2)
+        string = f"I'm a bot that plays Wordle. I've played {stats['games_played']} games and average {avg} guesses per game. My longest streak is {stats['max_streak']}. Code - http://github.com/cezar-r/wordle"
         update_bio(string)
 
 
@@ -150,76 +149,22 @@ class WordleBot:
         """
         This method displays the bots data to the console
         """
-        data = self.data['data']
-        games_played = data['games_played']
-        win_rate = data['win_rate']
-        cur_streak = data['cur_streak']
-        max_streak = data['max_streak']
-
-        print(f'\nGames played: {games_played}\nWin rate: {win_rate}%\nCurrent streak: {cur_streak}\nMax streak: {max_streak}\n')
-        win_rate_data = {}
-        wins = 0
-        for game in list(data['game_history'].values()):
-            if game['won']:
-                guesses = len(game) // 2
-                if guesses in win_rate_data:
-                    win_rate_data[guesses] += 1
-                else:
-                    win_rate_data[guesses] = 1
-                wins += 1
-        win_rate_data = list(sorted(list(win_rate_data.items()), key = lambda x: x[1]))[::-1]
-        most_bars = win_rate_data[0][1]
+        stats = self.log.stats
+        print(f'\nGames played: {stats["games_played"]}\nWin rate: {self.log.win_rate()}%\nCurrent streak: {stats["cur_streak"]}\nMax streak: {stats["max_streak"]}\n')
+        distribution = {int(n_guesses) : amount for n_guesses, amount in stats['distribution'].items()}
+        most_bars = max(max(distribution.values()), 1)
         for i in range(1, 7):
-            if i not in dict(win_rate_data):
+            if not distribution.get(i):
                 print(f"{i}  | 0")
             else:
-                print(f"{i}  {'|' * round((dict(win_rate_data)[i] / most_bars) * 10 + 1)} {dict(win_rate_data)[i]}")
-        weighted_sum = 0
-        total = 0
-        for n_guesses, amount in win_rate_data:
-            weighted_sum += n_guesses * amount
-            total += amount
-        avg = weighted_sum / total
-        print(f"Average: {round(avg, 2)}")
+                print(f"{i}  {'|' * round((distribution[i] / most_bars) * 10 + 1)} {distribution[i]}")
+        print(f"Average: {round(self.log.avg_guesses(), 2)}")
         print()
 
-    def _calc_cur_streak(self, data):
-        """
-        This method calculates the current streak of the bot
-
-        Parameters
-        ----------
-        data:       dict
-                    bots overall game data
-        """
-        cur_streak = 0
-        for game in list(data['game_history'].values())[::-1]:
-            if game['won']:
-                cur_streak += 1
-            else:
-                return cur_streak
-        return cur_streak
-
-    def _calc_win_rate(self, data):
-        """
-        This method calculates the win rate of the bot
-
-        Parameters
-        ----------
-        data:       dict
-                    bots overall game data
-        """
-        if data['games_played'] == 0:
-            return 0
-        wins = 0
-        for game in list(data['game_history'].values()):
-            if game['won']:
-                wins += 1
-        return round(wins / data['games_played'] * 100)
-
     def _guess(self, guess):
         """
         This method inputs a guess into the wordle website and returns its evaluation
+        from the game backend, see game.new_game
 
         Parmeters
         ---------
@@ -228,19 +173,10 @@ class WordleBot:
 
         Returns
         -------
-        guess_results   list
-                        list of evaluation results
+        code:           int
+                        pattern code of the evaluation, see feedback.encode_pattern
         """
-        query = f"""return document.querySelector('game-app').shadowRoot.querySelector('game-row[letters = "{guess}"]').shadowRoot.querySelectorAll('game-tile[letter]')"""
-        guess_results = []
-        sends = driver.find_element(By.XPATH, "/html/body")
-        sends.click()
-        for char in guess:
-            sends.send_keys(char)
-            time.sleep(.2)
-        sends.send_keys(Keys.ENTER)
-        inner_texts = [my_elem.get_attribute("outerHTML") for my_elem in driver.execute_script(query)]
-        for inner_text in inner_texts:
-            guess_results.append(inner_text.split()[2].split('"')[1])  # gets the result of each tile
-            time.sleep(1)
-        return guess_results
\ No newline at end of file
+        code = self.game.check_guess(guess)
+        if getattr(self.game, 'latencies', None):
+            print(f"{guess} {render_pattern(code)} in {round(self.game.latencies[-1], 2)} seconds")
+        return code
@@ -0,0 +1,138 @@
+import os
+import time
+import argparse
+from pathlib import Path
+
+from feedback import EVAL_CODES, encode_pattern
+
+URL = "https://www.nytimes.com/games/wordle/"
+DRIVER_PATH = r"C:\Program Files (x86)\chromedriver.exe"
+STANDIN_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "wordle.html")
+
+# returns the evaluation of every tile of the row holding a word, or null until all five are revealed
+ROW_SCRIPT = """
+const app = document.querySelector('game-app');
+if (!app) return null;
+const row = app.shadowRoot.querySelector(`game-row[letters="${arguments[0]}"]`);
+if (!row) return null;
+const evaluations = Array.from(row.shadowRoot.querySelectorAll('game-tile[letter]'), tile => tile.getAttribute('evaluation'));
+return evaluations.length === 5 && evaluations.every(evaluation => evaluation) ? evaluations : null;
+"""
+
+_driver = None
+
+
+def get_driver(headless = False):
+    """
+    This method returns the shared Chrome driver, starting it the first
+    time it is needed so that importing the bots does not open a browser
+
+    Parameters
+    ----------
+    headless:   bool
+                true to run Chrome without a window, only used when it is started
+
+    Returns
+    -------
+    driver:     webdriver.Chrome
+                Chrome driver
+    """
+    global _driver
+    if _driver is None:
+        from selenium import webdriver
+        options = webdriver.ChromeOptions()
+        options.add_experimental_option('excludeSwitches', ['enable-logging'])
+        if headless:
+            options.add_argument("--headless")
+        _driver = webdriver.Chrome(executable_path = DRIVER_PATH, service_log_path = 'NUL', options = options)
+    return _driver
+
+
+def standin_url(answer, delay = 250):
+    """This method returns the url of the local stand-in page for an answer, see static/wordle.html"""
+    return f"{Path(STANDIN_FILE).as_uri()}?answer={answer}&delay={delay}"
+
+
+class BrowserGame:
+    """
+    This class plays a game on the Wordle page, or on the local stand-in
+    of it, through Selenium. Each guess is typed in a single action and
+    its row is read with one script call as soon as every tile has been
+    revealed, instead of after fixed sleeps. It can be used anywhere a
+    game.Game is used, and keeps the latency of every guess
+    """
+    def __init__(self, url = URL, answer = None, timeout = 10, poll = 0.05, headless = False):
+        self.url = url
+        self.answer = answer
+        self.timeout = timeout
+        self.poll = poll
+        self.headless = headless
+        self.latencies = []
+        self._opened = False
+
+    def _open(self):
+        """This method loads the page the first time a guess is made"""
+        from selenium.webdriver.support.ui import WebDriverWait
+        driver = get_driver(self.headless)
+        driver.get(self.url)
+        WebDriverWait(driver, self.timeout, self.poll).until(lambda d: d.execute_script("return !!document.querySelector('game-app')"))
+        self._opened = True
+
+    def check_guess(self, guess):
+        """
+        This method types a guess and waits until the page has revealed
+        the evaluation of every tile of its row
+
+        Parameters
+        ----------
+        guess:      str
+                    guessed word
+
+        Returns
+        -------
+        code:       int
+                    pattern code of the evaluation, see feedback.encode_pattern
+        """
+        from selenium.common.exceptions import TimeoutException
+        from selenium.webdriver.common.action_chains import ActionChains
+        from selenium.webdriver.common.keys import Keys
+        from selenium.webdriver.support.ui import WebDriverWait
+        if not self._opened:
+            self._open()
+        driver = get_driver(self.headless)
+        start = time.perf_counter()
+        ActionChains(driver).send_keys(guess + Keys.ENTER).perform()
+        try:
+            evaluations = WebDriverWait(driver, self.timeout, self.poll).until(lambda d: d.execute_script(ROW_SCRIPT, guess))
+        except TimeoutException:
+            raise ValueError(f"{guess} was not evaluated within {self.timeout} seconds, it may not be accepted by the page")
+        self.latencies.append(time.perf_counter() - start)
+        if any(evaluation not in EVAL_CODES for evaluation in evaluations):
+            raise ValueError(f"unexpected tile evaluations {evaluations}")
+        return encode_pattern(evaluations)
+
+    def get_answer(self):
+        """This method returns the correct answer, if it is known"""
+        return self.answer
+
+
+def main():
+    from console_bot import ConsoleWordleBot
+    parser = argparse.ArgumentParser(description = "Play the bot against the local stand-in of the Wordle page")
+    parser.add_argument("answer")
+    parser.add_argument("--first-guess", default = "slate")
+    parser.add_argument("--delay", type = int, default = 250, help = "milliseconds before each tile is revealed")
+    parser.add_argument("--headless", action = "store_true")
+    args = parser.parse_args()
+    game = BrowserGame(standin_url(args.answer, args.delay), args.answer, headless = args.headless)
+    bot = ConsoleWordleBot(args.first_guess)
+    bot.play_game(game)
+    game_data = bot.get_data()[-1]
+    for i, latency in enumerate(game.latencies):
+        print(f"{game_data[f'guess_{i+1}']}  {game_data[f'eval_{i+1}']}  {latency:.3f} seconds")
+    print(f"{'Won' if game_data['won'] else 'Lost'} in {game_data['num_guesses']} guesses, {sum(game.latencies):.2f} seconds in the browser")
+    get_driver().quit()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+import numpy as np
+
+from words import WORDBANK, words_to_letters
+from feedback import load_matrix, batch_check_guess
+
+
+def all_candidates(exclude = ()):
+    """
+    This method returns the candidate set holding every word in the word bank
+    Candidate sets are sorted arrays of indices into WORDBANK.words, so they
+    stay in alphabetical order as they are filtered
+
+    Parameters
+    ----------
+    exclude:        iterable
+                    words to leave out, i.e. previous answers
+
+    Returns
+    -------
+    candidates:     np.ndarray
+                    sorted word bank indices
+    """
+    return exclude_words(np.arange(len(WORDBANK), dtype = np.intp), exclude)
+
+
+def exclude_words(candidates, words):
+    """
+    This method removes a list of words from a candidate set
+
+    Parameters
+    ----------
+    candidates:     np.ndarray
+                    sorted word bank indices
+    words:          iterable
+                    words to remove, words outside the word bank are ignored
+
+    Returns
+    -------
+    candidates:     np.ndarray
+                    sorted word bank indices without the given words
+    """
+    word_index = WORDBANK.index
+    excluded = [word_index[word] for word in words if word in word_index]
+    if not excluded:
+        return candidates
+    return candidates[~np.isin(candidates, excluded)]
+
+
+def filter_candidates(guess, code, candidates, matrix = None):
+    """
+    This method keeps the candidates that would have given the same
+    pattern for the guess. It is a single comparison against the
+    guess's row of the feedback matrix, or against the patterns of
+    the guess computed directly if it is not in the word bank
+
+    Parameters
+    ----------
+    guess:          str
+                    previous guess
+    code:           int
+                    pattern code of the evaluation of the previous guess
+    candidates:     np.ndarray
+                    sorted word bank indices
+    matrix:         np.ndarray
+                    feedback matrix, loaded from the cache if not given
+
+    Returns
+    -------
+    candidates:     np.ndarray
+                    sorted word bank indices that are still possible
+    """
+    if guess not in WORDBANK.index:
+        return candidates[batch_check_guess(words_to_letters([guess])[0], WORDBANK.letters[candidates]) == code]
+    if matrix is None:
+        matrix = load_matrix()
+    return candidates[matrix[WORDBANK.index[guess]][candidates] == code]
+
+
+def candidate_words(candidates):
+    """This method returns the words of a candidate set in alphabetical order"""
+    return [WORDBANK.words[i] for i in candidates]
+
+
+def candidate_mask(candidates):
+    """This method returns a candidate set as a boolean mask over WORDBANK.words"""
+    mask = np.zeros(len(WORDBANK), dtype = bool)
+    mask[candidates] = True
+    return mask
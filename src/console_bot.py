@@ -1,19 +1,34 @@
-from game import Game
-from utils import find_poss_words, new_guess, guessed_word, color_dict
+from game import Game, new_game
+from utils import SOLVER_SETTINGS, best_guess, guessed_word
 from words import WORDBANK
+from candidates import all_candidates, filter_candidates
+from memo import GUESS_MEMO
+from book import load_book
+from results import GameResults
+from instrument import HOOKS, emit
 from datetime import datetime
+from time import perf_counter
 
 
 class ConsoleWordleBot:
     """
     This method represents a bot that plays on the 
     command line. It is initialized with the first
-    guess.
+    guess. The second guess is looked up in the
+    opening book of the first guess, see book.py
+    Games it creates are on the backend given, see game.new_game
     """
-    def __init__(self, first_guess, verbose = False):
-        self.data = []
+    def __init__(self, first_guess, verbose = False, memo = GUESS_MEMO, store = None, settings = None, use_book = True, spill_file = None, backend = 'local', backend_options = None):
+        self.data = GameResults(spill_file)
         self.verbose = verbose
         self.first_guess = first_guess
+        self.memo = memo
+        self.store = store
+        self.settings = {**SOLVER_SETTINGS, **(settings or {})}
+        self.use_book = use_book and first_guess in WORDBANK.index
+        self.book = None
+        self.backend = backend
+        self.backend_options = backend_options or {}
 
     def play_game(self, game = None):
         """
@@ -24,16 +39,16 @@ class ConsoleWordleBot:
         Parameters
         ----------
         game:       Game()
-                    game to play on, otherwise create new one
+                    game to play on, otherwise create new one on the bot's backend
 
         Returns
         -------
         bool:       true if won, false if lost
         """
         if not game:
-            game = Game()
+            game = new_game(self.backend, **self.backend_options)
         guess = self.first_guess
-        poss_words = WORDBANK
+        candidates = all_candidates()
         guesses = 0
         prev_guesses = []
         prev_guess_results = []
@@ -41,14 +56,39 @@ class ConsoleWordleBot:
         start = datetime.now()
         while guesses < 6:
             guesses += 1
-            guess_results = game.check_guess(guess)
+            code = game.check_guess(guess)
             prev_guesses.append(guess)
-            prev_guess_results.append(guess_results)
-            if guessed_word(guess_results):
+            prev_guess_results.append(code)
+            if guessed_word(code):
                 won = True
                 break
-            poss_words = find_poss_words(guess, guess_results, poss_words, [])
-            guess = new_guess(poss_words, poss_words, prev_guesses, [])
+            if not HOOKS:
+                candidates = filter_candidates(guess, code, candidates)
+                guess = self._book_guess(guesses, code) or best_guess(candidates, prev_guesses, [], self.memo, self.store, settings = self.settings)
+                continue
+            info = {}
+            n_before = len(candidates)
+            turn_start = perf_counter()
+            candidates = filter_candidates(guess, code, candidates)
+            filter_end = perf_counter()
+            guess = self._book_guess(guesses, code)
+            if guess is None:
+                guess = best_guess(candidates, prev_guesses, [], self.memo, self.store, info, settings = self.settings)
+            else:
+                info = {'guesses_scored' : 0, 'guesses_pruned' : 0, 'cache' : 'book', 'lookahead_states' : 0, 'lookahead_time' : 0.0}
+            emit({'first_guess' : self.first_guess,
+                    'answer' : game.get_answer(),
+                    'turn' : guesses,
+                    'candidates_before' : n_before,
+                    'candidates_after' : len(candidates),
+                    'guesses_scored' : info['guesses_scored'],
+                    'guesses_pruned' : info['guesses_pruned'],
+                    'filter_time' : filter_end - turn_start,
+                    'score_time' : perf_counter() - filter_end,
+                    'lookahead_states' : info['lookahead_states'],
+                    'lookahead_time' : info['lookahead_time'],
+                    'cache' : info['cache'],
+                    'next_guess' : guess})
 
         elapsed = (datetime.now() - start).total_seconds()
         self._update_data(prev_guesses, prev_guess_results, won, game, elapsed)
@@ -56,45 +96,57 @@ class ConsoleWordleBot:
             self.display_game(idx = -1)
         return game
 
+    def _book_guess(self, turn, code):
+        """
+        This method returns the opening book's guess after the first
+        turn, or None if there is none. The book is loaded the first
+        time it is needed
+
+        Parameters
+        ----------
+        turn:       int
+                    number of guesses made so far
+        code:       int
+                    pattern code of the last guess
+
+        Returns
+        -------
+        guess:      str
+                    next guess, or None
+        """
+        if turn != 1 or not self.use_book:
+            return None
+        self.prepare_book()
+        return self.book.get(code)
+
+    def prepare_book(self):
+        """This method loads the bot's opening book, building it first if it is missing"""
+        if self.use_book and self.book is None:
+            self.book = load_book(self.first_guess, settings = self.settings)
+
     def get_data(self):
         """This method returns the bots data"""
         return self.data
 
     def display_data(self):
         """This method displays the bots data"""
-        wins = 0
-        losses = 0
-        num_guesses = 0
-        lost_on = []
-        total_elapsed = 0
-        distribution = {}
-        for game in self.data:
-            if game['won']:
-                wins += 1
-                guesses = game['num_guesses']
-                if guesses in distribution:
-                    distribution[guesses] += 1
-                else:
-                    distribution[guesses] = 1
-                num_guesses += game['num_guesses']
-            else:
-                losses += 1
-                lost_on.append(game['answer'])
-            total_elapsed += game['time_to_solve']
-        print(f'Bot data using "{self.first_guess.upper()}" as first word after {len(self.data)} games:\n\nWin rate: {wins/(wins+losses) * 100}%\nAvg Guesses: {num_guesses/wins}\nAvg Time Spent: {round(total_elapsed / (wins+losses), 2)} seconds\n')
-        
-        win_rate_data = list(sorted(list(distribution.items()), key = lambda x: x[1]))[::-1]
-        most_bars = win_rate_data[0][1]
+        data = self.data
+        wins = data.wins
+        losses = data.losses
+        print(f'Bot data using "{self.first_guess.upper()}" as first word after {len(data)} games:\n\nWin rate: {wins/(wins+losses) * 100}%\nAvg Guesses: {data.total_guesses/wins}\nAvg Time Spent: {round(data.total_time / (wins+losses), 2)} seconds\n')
+
+        most_bars = data.distribution.max()
         for i in range(1, 7):
-            if i not in dict(win_rate_data):
+            if not data.distribution[i]:
                 print(f"{i}  | 0")
             else:
-                print(f"{i}  {'|' * round((dict(win_rate_data)[i] / most_bars) * 10 + 1)} {dict(win_rate_data)[i]}")
-        
+                print(f"{i}  {'|' * round((data.distribution[i] / most_bars) * 10 + 1)} {data.distribution[i]}")
+
+        lost_on = data.lost_on_words()
         if lost_on:
             print("\nLost on words:")
-            for elem in lost_on:
-                print(elem)
+            for elem, times in lost_on:
+                print(elem if times == 1 else f"{elem} x{times}")
         print('\n')
 
     def display_game(self, idx = None, correct_answer = None):
@@ -113,9 +165,9 @@ class ConsoleWordleBot:
             for key, val in list(self.data[idx].items()):
                 print(f"{key}: {val}")
         elif correct_answer:
-            for i, game in enumerate(self.data):
-                if game['correct_answer'] == correct_answer:
-                    return self.display_game(idx = i)
+            idx = self.data.find(correct_answer)
+            if idx is not None:
+                return self.display_game(idx = idx - len(self.data))
 
     def _update_data(self, prev_guesses, prev_guess_results, won, game, elapsed):
         """
@@ -130,15 +182,7 @@ class ConsoleWordleBot:
         game:               Game()
                             game object of game     
         """
-        game_data = {}
-        game_data['won'] = won 
-        for i, (guess, evaluation) in enumerate(zip(prev_guesses, prev_guess_results)):
-            game_data[f"guess_{i+1}"] = guess
-            game_data[f"eval_{i+1}"] = "".join([color_dict[_eval] for _eval in evaluation])
-        game_data['num_guesses'] = len(prev_guesses)
-        game_data['answer'] = game.get_answer()
-        game_data['time_to_solve'] = round(elapsed, 2)
-        self.data.append(game_data)
+        self.data.add(game.get_answer(), prev_guesses, prev_guess_results, won, elapsed)
 
 
 if __name__ == '__main__':
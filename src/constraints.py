@@ -0,0 +1,124 @@
+import numpy as np
+
+from words import WORDBANK, words_to_letters
+from feedback import EVAL_CODES
+
+N_LETTERS = 26
+ABSENT = EVAL_CODES['absent']
+CORRECT = EVAL_CODES['correct']
+
+
+def count_letters(letters):
+    """
+    This method counts how many times each letter appears in each word
+
+    Parameters
+    ----------
+    letters:        np.ndarray
+                    uint8 array of shape (n_words, 5) from words.words_to_letters
+
+    Returns
+    -------
+    letter_counts:  np.ndarray
+                    uint8 array of shape (n_words, 26)
+    """
+    letter_counts = np.zeros((len(letters), N_LETTERS), dtype = np.uint8)
+    for i in range(5):
+        np.add.at(letter_counts, (np.arange(len(letters)), letters[:, i]), 1)
+    return letter_counts
+
+
+class Constraints:
+    """
+    This class keeps the running state of everything learned from
+    the guesses so far; the green letter of each position, the letters
+    banned from each position and the minimum and maximum count of each
+    letter. Every (guess, evaluation) is folded in once, and the state
+    is checked against a whole letter array at a time
+    """
+    def __init__(self, words = None):
+        self.words = list(WORDBANK.words if words is None else words)
+        self.letters = words_to_letters(self.words)
+        self.letter_counts = count_letters(self.letters)
+        self.green = np.full(5, -1, dtype = np.int8)
+        self.banned = np.zeros((5, N_LETTERS), dtype = bool)
+        self.min_count = np.zeros(N_LETTERS, dtype = np.uint8)
+        self.max_count = np.full(N_LETTERS, 5, dtype = np.uint8)
+        self.mask = np.ones(len(self.words), dtype = bool)
+        self.eliminated = []
+
+    def add(self, guess, code):
+        """
+        This method folds a guess and its evaluation into the constraints
+        and removes every word that no longer matches
+
+        Parameters
+        ----------
+        guess:          str
+                        guessed word
+        code:           int
+                        pattern code of the evaluation, see feedback.encode_pattern
+
+        Returns
+        -------
+        eliminated:     int
+                        number of candidates removed by this clue
+        """
+        marked = {}
+        absent = set()
+        for i, letter in enumerate(guess):
+            letter = ord(letter) - ord('a')
+            evaluation = code % 3
+            code //= 3
+            if evaluation == CORRECT:
+                self.green[i] = letter
+            else:
+                self.banned[i, letter] = True
+            if evaluation == ABSENT:
+                absent.add(letter)
+            else:
+                marked[letter] = marked.get(letter, 0) + 1
+        for letter in set(marked) | absent:
+            count = marked.get(letter, 0)
+            self.min_count[letter] = max(self.min_count[letter], count)
+            if letter in absent:
+                self.max_count[letter] = min(self.max_count[letter], count)
+
+        alive = np.flatnonzero(self.mask)
+        keep = self.matches(self.letters[alive], self.letter_counts[alive])
+        self.mask[alive[~keep]] = False
+        eliminated = int((~keep).sum())
+        self.eliminated.append(eliminated)
+        return eliminated
+
+    def matches(self, letters, letter_counts = None):
+        """
+        This method checks a block of words against the constraints
+
+        Parameters
+        ----------
+        letters:        np.ndarray
+                        uint8 array of shape (n_words, 5) from words.words_to_letters
+        letter_counts:  np.ndarray
+                        count of each letter in each word, computed if not given
+
+        Returns
+        -------
+        matches:        np.ndarray
+                        true for every word that satisfies all constraints
+        """
+        if letter_counts is None:
+            letter_counts = count_letters(letters)
+        positions = np.arange(5)
+        green_ok = (self.green < 0) | (letters == self.green)
+        banned_ok = ~self.banned[positions, letters]
+        count_ok = (letter_counts >= self.min_count) & (letter_counts <= self.max_count)
+        return green_ok.all(axis = 1) & banned_ok.all(axis = 1) & count_ok.all(axis = 1)
+
+    def candidates(self):
+        """This method returns the indices of the words that still match"""
+        return np.flatnonzero(self.mask)
+
+    def candidate_words(self):
+        """This method returns the words that still match"""
+        return [self.words[i] for i in self.candidates()]
@@ -0,0 +1,330 @@
+import time
+import numpy as np
+
+from words import WORDBANK
+from feedback import N_PATTERNS, load_matrix
+from constraints import count_letters
+
+PRUNE_TOLERANCE = 1e-9
+SCORE_DECIMALS = 12
+
+_word_letters = None
+_letter_presence = None
+
+
+def partition_counts(codes):
+    """
+    This method builds the partition histogram of every guess in a block
+    with a single bincount, by offsetting each row into its own range of
+    243 bins
+
+    Parameters
+    ----------
+    codes:      np.ndarray
+                uint8 pattern codes of shape (n_guesses, n_answers)
+
+    Returns
+    -------
+    counts:     np.ndarray
+                array of shape (n_guesses, 243) where counts[i, code] is the number
+                of answers that give that pattern for guess i
+    """
+    n_guesses = codes.shape[0]
+    offsets = np.arange(n_guesses, dtype = np.intp)[:, None] * N_PATTERNS
+    counts = np.bincount((codes + offsets).ravel(), minlength = n_guesses * N_PATTERNS)
+    return counts.reshape(n_guesses, N_PATTERNS)
+
+
+def get_entropy(counts):
+    """
+    This method calculates the entropy of each partition histogram
+    Entropy is the sum of p * log2(1/p) over every outcome, where
+    p is the number of words with that outcome / total number of possible words
+    Written in terms of the counts c and the total n this is
+    log2(n) - sum(c * log2(c)) / n
+
+    Parameters
+    ----------
+    counts:     np.ndarray
+                array of shape (n_guesses, 243) from partition_counts
+
+    Returns
+    -------
+    entropy:    np.ndarray
+                entropy value of each guess
+    """
+    n_words = counts.sum(axis = 1)
+    weighted = counts * np.log2(np.maximum(counts, 1))
+    with np.errstate(divide = 'ignore', invalid = 'ignore'):
+        entropy = np.log2(n_words) - weighted.sum(axis = 1) / n_words
+    return np.nan_to_num(entropy)
+
+
+def score_guesses(guess_idx, answer_idx, matrix = None, block_size = 1024):
+    """
+    This method scores a list of guesses against a set of possible answers
+    using the feedback matrix, one block of guesses at a time
+
+    Parameters
+    ----------
+    guess_idx:  np.ndarray
+                word bank indices of the guesses to score
+    answer_idx: np.ndarray
+                word bank indices of the possible answers
+    matrix:     np.ndarray
+                feedback matrix, loaded from the cache if not given
+    block_size: int
+                number of guesses scored per bincount call
+
+    Returns
+    -------
+    scores:     np.ndarray
+                entropy of each guess, in the same order as guess_idx
+    """
+    if matrix is None:
+        matrix = load_matrix()
+    guess_idx = np.asarray(guess_idx, dtype = np.intp)
+    answer_idx = np.asarray(answer_idx, dtype = np.intp)
+    scores = np.zeros(len(guess_idx))
+    for start in range(0, len(guess_idx), block_size):
+        block = guess_idx[start:start + block_size]
+        codes = matrix[np.ix_(block, answer_idx)]
+        scores[start:start + block_size] = get_entropy(partition_counts(codes))
+    return scores
+
+
+def rank_scores(scores, prefer = None):
+    """
+    This method orders scores from best to worst. Ties go to the
+    guess that comes last, matching a reversed stable sort. When
+    preferred guesses are given, i.e. guesses that could still be
+    the answer, ties go to them first
+
+    Parameters
+    ----------
+    scores:     np.ndarray
+                score of each guess
+    prefer:     np.ndarray
+                true for each guess that wins ties, if any
+
+    Returns
+    -------
+    order:      np.ndarray
+                positions into scores from the highest score to the lowest
+    """
+    if prefer is None:
+        return np.argsort(scores, kind = 'stable')[::-1]
+    return np.lexsort((prefer, np.round(scores, SCORE_DECIMALS)))[::-1]
+
+
+def rank_guesses(guess_idx, answer_idx, matrix = None, prefer = None):
+    """
+    This method ranks guesses by their entropy against a set of possible answers
+
+    Parameters
+    ----------
+    guess_idx:      np.ndarray
+                    word bank indices of the guesses to score
+    answer_idx:     np.ndarray
+                    word bank indices of the possible answers
+    matrix:         np.ndarray
+                    feedback matrix, loaded from the cache if not given
+    prefer:         np.ndarray
+                    true for each guess that wins ties, see rank_scores
+
+    Returns
+    -------
+    ranked_idx:     np.ndarray
+                    word bank indices of the guesses from best to worst
+    ranked_scores:  np.ndarray
+                    entropy of each guess in ranked_idx
+    """
+    guess_idx = np.asarray(guess_idx, dtype = np.intp)
+    scores = score_guesses(guess_idx, answer_idx, matrix)
+    order = rank_scores(scores, prefer)
+    return guess_idx[order], scores[order]
+
+
+def word_letters():
+    """This method returns the letter array of the word bank, see words.words_to_letters"""
+    global _word_letters
+    if _word_letters is None:
+        _word_letters = np.asarray(WORDBANK.letters)
+    return _word_letters
+
+
+def letter_presence():
+    """This method returns a boolean array of which letters each word bank word contains"""
+    global _letter_presence
+    if _letter_presence is None:
+        _letter_presence = count_letters(word_letters()) > 0
+    return _letter_presence
+
+
+def coverage_order(guess_idx, answer_idx):
+    """
+    This method orders guesses by a cheap estimate of how good they are;
+    the sum, over the distinct letters of a guess, of how many possible
+    answers contain that letter
+
+    Parameters
+    ----------
+    guess_idx:  np.ndarray
+                word bank indices of the guesses
+    answer_idx: np.ndarray
+                word bank indices of the possible answers
+
+    Returns
+    -------
+    order:      np.ndarray
+                positions into guess_idx from the most promising guess to the least
+    """
+    presence = letter_presence()
+    letter_freq = presence[answer_idx].sum(axis = 0)
+    coverage = presence[guess_idx] @ letter_freq
+    return np.argsort(-coverage, kind = 'stable')
+
+
+def rank_guesses_anytime(guess_idx, answer_idx, deadline = None, matrix = None, block_size = 128, prefer = None):
+    """
+    This method ranks guesses like rank_guesses, but scores them in blocks
+    in order of coverage_order, the preferred guesses first, and stops once
+    the deadline passes, so it always returns the best guess found so far
+    With no deadline every guess is scored and the result is the same as
+    rank_guesses
+
+    Parameters
+    ----------
+    guess_idx:      np.ndarray
+                    word bank indices of the guesses to score
+    answer_idx:     np.ndarray
+                    word bank indices of the possible answers
+    deadline:       float
+                    time.perf_counter() value to stop at, if any
+    matrix:         np.ndarray
+                    feedback matrix, loaded from the cache if not given
+    block_size:     int
+                    number of guesses scored between deadline checks
+    prefer:         np.ndarray
+                    true for each guess that wins ties, see rank_scores
+
+    Returns
+    -------
+    ranked_idx:     np.ndarray
+                    word bank indices of the scored guesses from best to worst
+    ranked_scores:  np.ndarray
+                    entropy of each guess in ranked_idx
+    evaluated:      float
+                    fraction of the guesses that were scored
+    """
+    guess_idx = np.asarray(guess_idx, dtype = np.intp)
+    if deadline is None:
+        ranked_idx, ranked_scores = rank_guesses(guess_idx, answer_idx, matrix, prefer)
+        return ranked_idx, ranked_scores, 1.0
+    order = coverage_order(guess_idx, answer_idx)
+    if prefer is not None:
+        # the words that could still be the answer are scored before the deadline can cut them off
+        order = order[np.argsort(~prefer[order], kind = 'stable')]
+    scores = np.zeros(len(guess_idx))
+    n_scored = 0
+    while n_scored < len(order):
+        block = order[n_scored:n_scored + block_size]
+        scores[block] = score_guesses(guess_idx[block], answer_idx, matrix)
+        n_scored += len(block)
+        if time.perf_counter() >= deadline:
+            break
+    # keep the scored guesses in their original order so ties break the same way as rank_guesses
+    scored = np.sort(order[:n_scored])
+    ranked = scored[rank_scores(scores[scored], None if prefer is None else prefer[scored])]
+    return guess_idx[ranked], scores[ranked], n_scored / max(len(guess_idx), 1)
+
+
+def entropy_upper_bounds(guess_idx, answer_idx):
+    """
+    This method bounds the entropy of each guess without partitioning the
+    answers. Each tile of a guess can only be correct if some possible answer
+    has that letter in that spot, present if some answer has the letter in
+    another spot, and absent if some answer does not have it in that spot.
+    The product of the states each tile can take, capped at the number of
+    answers, bounds the number of outcomes, and entropy is at most log2 of that
+
+    Parameters
+    ----------
+    guess_idx:  np.ndarray
+                word bank indices of the guesses
+    answer_idx: np.ndarray
+                word bank indices of the possible answers
+
+    Returns
+    -------
+    bounds:     np.ndarray
+                upper bound on the entropy of each guess
+    """
+    n_answers = len(answer_idx)
+    answer_letters = word_letters()[answer_idx]
+    containing = letter_presence()[answer_idx].sum(axis = 0)
+    position_counts = np.zeros((5, containing.shape[0]), dtype = np.intp)
+    for i in range(5):
+        position_counts[i] = np.bincount(answer_letters[:, i], minlength = containing.shape[0])
+    guess_letters = word_letters()[guess_idx]
+    at_position = position_counts[np.arange(5), guess_letters]
+    can_be_correct = at_position > 0
+    can_be_present = containing[guess_letters] > at_position
+    can_be_absent = at_position < n_answers
+    states = can_be_correct.astype(np.intp) + can_be_present + can_be_absent
+    outcomes = np.minimum(states.prod(axis = 1), n_answers)
+    return np.log2(np.maximum(outcomes, 1))
+
+
+def rank_guesses_pruned(guess_idx, answer_idx, top_k = 1, matrix = None, block_size = 64, prefer = None):
+    """
+    This method finds the best guesses with branch and bound. Guesses are
+    scored in blocks from the highest upper bound to the lowest, and once a
+    guess's bound is below the k'th best score found so far it, and every
+    guess after it, is skipped. The top k guesses, including how ties are
+    broken, are the same as rank_guesses
+
+    Parameters
+    ----------
+    guess_idx:      np.ndarray
+                    word bank indices of the guesses to score
+    answer_idx:     np.ndarray
+                    word bank indices of the possible answers
+    top_k:          int
+                    number of best guesses that must be exact
+    matrix:         np.ndarray
+                    feedback matrix, loaded from the cache if not given
+    block_size:     int
+                    number of guesses scored between bound checks
+    prefer:         np.ndarray
+                    true for each guess that wins ties, see rank_scores
+
+    Returns
+    -------
+    ranked_idx:     np.ndarray
+                    word bank indices of the scored guesses from best to worst
+    ranked_scores:  np.ndarray
+                    entropy of each guess in ranked_idx
+    stats:          dict
+                    {'scored', 'pruned'} number of guesses scored and skipped
+    """
+    guess_idx = np.asarray(guess_idx, dtype = np.intp)
+    bounds = entropy_upper_bounds(guess_idx, answer_idx)
+    order = np.argsort(-bounds, kind = 'stable')
+    scores = np.zeros(len(guess_idx))
+    scored = np.zeros(len(guess_idx), dtype = bool)
+    threshold = -np.inf
+    for start in range(0, len(order), block_size):
+        block = order[start:start + block_size]
+        block = block[bounds[block] >= threshold - PRUNE_TOLERANCE]
+        if len(block) == 0:
+            break
+        scores[block] = score_guesses(guess_idx[block], answer_idx, matrix)
+        scored[block] = True
+        if scored.sum() >= top_k:
+            threshold = np.partition(scores[scored], -top_k)[-top_k]
+    # keep the scored guesses in their original order so ties break the same way as rank_guesses
+    kept = np.flatnonzero(scored)
+    ranked = kept[rank_scores(scores[kept], None if prefer is None else prefer[kept])]
+    n_scored = len(kept)
+    return guess_idx[ranked], scores[ranked], {'scored' : n_scored, 'pruned' : len(guess_idx) - n_scored}
@@ -0,0 +1,259 @@
+import os
+import numpy as np
+
+from words import CACHE_DIR, WORDBANK, file_hash, words_to_letters, write_atomic
+
+WORDBANK_FILE = "wordbank.txt"
+
+EVAL_CODES = {'absent' : 0,
+                'present' : 1,
+                'correct' : 2}
+EVALUATIONS = ['absent', 'present', 'correct']
+N_PATTERNS = 3 ** 5
+ALL_CORRECT = N_PATTERNS - 1
+MAX_GUESSES = 6
+
+color_dict = {'present' : "🟨",
+                'correct' : "🟩",
+                'absent' : "🏴󠁵󠁳󠁴󠁸󠁿"}
+
+
+_POWERS = 3 ** np.arange(5)
+_EARLIER = np.tri(5, k = -1, dtype = bool)
+
+_matrix = None
+
+
+def __getattr__(name):
+    # WORD_LIST and WORD_INDEX are only built the first time they are used, see words.WordList
+    if name == 'WORD_LIST':
+        return WORDBANK.words
+    if name == 'WORD_INDEX':
+        return WORDBANK.index
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def encode_pattern(guess_results):
+    """
+    This method turns a list of evaluations into its base 3 pattern code
+    The first tile is the least significant digit, so the code
+    for all correct tiles is 242
+
+    Parameters
+    ----------
+    guess_results:  list
+                    list of evaluation results ("correct", "present", or "absent")
+
+    Returns
+    -------
+    code:           int
+                    pattern code between 0 and 242
+    """
+    code = 0
+    for i, evaluation in enumerate(guess_results):
+        code += EVAL_CODES[evaluation] * 3 ** i
+    return code
+
+
+def decode_pattern(code):
+    """
+    This method turns a base 3 pattern code back into a list of evaluations
+
+    Parameters
+    ----------
+    code:           int
+                    pattern code between 0 and 242
+
+    Returns
+    -------
+    guess_results:  list
+                    list of evaluation results
+    """
+    guess_results = []
+    for _ in range(5):
+        guess_results.append(EVALUATIONS[code % 3])
+        code //= 3
+    return guess_results
+
+
+def render_pattern(code):
+    """
+    This method renders a pattern code as a row of emoji tiles, the way
+    results are shared and saved. Every row is rendered once, at import
+
+    Parameters
+    ----------
+    code:           int
+                    pattern code between 0 and 242
+
+    Returns
+    -------
+    row:            str
+                    one emoji per tile
+    """
+    return _ROWS[code]
+
+
+_ROWS = ["".join(color_dict[evaluation] for evaluation in decode_pattern(code)) for code in range(N_PATTERNS)]
+
+
+def wordbank_hash(filename = WORDBANK_FILE):
+    """This method returns a short hash of the word bank file contents"""
+    return file_hash(filename)
+
+
+def batch_check_guess(guesses, answers):
+    """
+    This method evaluates one guess, or a block of guesses, against a block
+    of answers in one call. Repeated letters are handled the same way
+    as utils.check_guess, where correct tiles are marked first and
+    the remaining letters are marked present from left to right
+
+    Parameters
+    ----------
+    guesses:    np.ndarray
+                uint8 array of shape (5,) or (n_guesses, 5) from words.words_to_letters
+    answers:    np.ndarray
+                uint8 array of shape (n_answers, 5) from words.words_to_letters
+
+    Returns
+    -------
+    codes:      np.ndarray
+                uint8 pattern codes of shape (n_answers,) or (n_guesses, n_answers)
+    """
+    guesses = np.asarray(guesses, dtype = np.uint8)
+    single = guesses.ndim == 1
+    guess_letters = np.atleast_2d(guesses)[:, None, :]
+    answer_letters = np.asarray(answers, dtype = np.uint8)[None, :, :]
+
+    correct = guess_letters == answer_letters
+    # copies of each guessed letter left in the answer once correct tiles are removed
+    same_letter = guess_letters[..., :, None] == answer_letters[..., None, :]
+    available = (same_letter & ~correct[..., None, :]).sum(axis = -1)
+    # copies of each guessed letter already used by earlier tiles that are not correct
+    repeated = (guess_letters[..., :, None] == guess_letters[..., None, :]) & _EARLIER
+    used = (repeated & ~correct[..., None, :]).sum(axis = -1)
+    present = ~correct & (used < available)
+
+    evaluations = correct * 2 + present
+    codes = (evaluations * _POWERS).sum(axis = -1).astype(np.uint8)
+    return codes[0] if single else codes
+
+
+def build_matrix(words = None, block_size = 256):
+    """
+    This method computes the pattern code of every guess against every answer
+
+    Parameters
+    ----------
+    words:      list
+                list of words used both as guesses and answers, the word bank if not given
+    block_size: int
+                number of guesses evaluated per call, which bounds memory use
+
+    Returns
+    -------
+    matrix:     np.ndarray
+                uint8 array where matrix[i, j] is the code of words[i] guessed against words[j]
+    """
+    if words is None:
+        words = WORDBANK.words
+    letters = words_to_letters(words)
+    matrix = np.zeros((len(words), len(words)), dtype = np.uint8)
+    for start in range(0, len(words), block_size):
+        matrix[start:start + block_size] = batch_check_guess(letters[start:start + block_size], letters)
+    return matrix
+
+
+def load_matrix(cache_dir = CACHE_DIR):
+    """
+    This method returns the feedback matrix for the word bank. It is
+    memory mapped from the cache directory, and is rebuilt whenever
+    the word bank file changes
+
+    Parameters
+    ----------
+    cache_dir:  str
+                directory the matrix is stored in
+
+    Returns
+    -------
+    matrix:     np.ndarray
+                read only uint8 feedback matrix
+    """
+    global _matrix
+    if _matrix is not None:
+        return _matrix
+    filename = os.path.join(cache_dir, f"feedback_{wordbank_hash()}.npy")
+    if not os.path.exists(filename):
+        os.makedirs(cache_dir, exist_ok = True)
+        for old_file in os.listdir(cache_dir):
+            old_filename = os.path.join(cache_dir, old_file)
+            if old_file.startswith("feedback_") and old_file.endswith(".npy") and old_filename != filename:
+                os.remove(old_filename)
+        write_atomic(filename, build_matrix())
+    _matrix = np.load(filename, mmap_mode = 'r')
+    return _matrix
+
+
+def word_indices(words):
+    """
+    This method returns the word bank index of every word in a list
+
+    Parameters
+    ----------
+    words:      list
+                list of words in the word bank
+
+    Returns
+    -------
+    indices:    np.ndarray
+                index of each word into WORD_LIST
+    """
+    word_index = WORDBANK.index
+    return np.fromiter((word_index[word] for word in words), dtype = np.intp, count = len(words))
+
+
+def get_pattern(guess, answer):
+    """
+    This method looks up the pattern code of a guess against an answer
+    Words outside of the word bank are evaluated directly
+
+    Parameters
+    ----------
+    guess:      str
+                guessed word
+    answer:     str
+                correct answer
+
+    Returns
+    -------
+    code:       int
+                pattern code between 0 and 242
+    """
+    word_index = WORDBANK.index
+    if guess in word_index and answer in word_index:
+        return int(load_matrix()[word_index[guess], word_index[answer]])
+    return int(batch_check_guess(words_to_letters([guess])[0], words_to_letters([answer]))[0])
+
+
+def get_patterns(guess, answers):
+    """
+    This method looks up the pattern codes of a guess against a list of answers
+
+    Parameters
+    ----------
+    guess:      str
+                guessed word
+    answers:    list
+                list of possible answers
+
+    Returns
+    -------
+    codes:      np.ndarray
+                pattern code of the guess against each answer
+    """
+    word_index = WORDBANK.index
+    if guess in word_index and all(answer in word_index for answer in answers):
+        return np.asarray(load_matrix()[word_index[guess]][word_indices(answers)])
+    return batch_check_guess(words_to_letters([guess])[0], words_to_letters(answers))
@@ -1,6 +1,6 @@
 import random
 from words import POSS_ANSWERS
-from utils import check_guess, color_dict
+from feedback import get_pattern, render_pattern
 
 
 class Game:
@@ -11,9 +11,10 @@ class Game:
     """
     def __init__(self, answer = None, verbose = False):
         if not answer:
-            self.answer = random.choice(list(POSS_ANSWERS ))
+            self.answer = random.choice(POSS_ANSWERS.words)
         else:
             self.answer = answer
+        self.guesses = []
         self.guess_results = []
         self.verbose = verbose
 
@@ -30,26 +31,63 @@ class Game:
 
         Returns
         -------
-        results:    list
-                    list of all evaluations
+        code:       int
+                    pattern code of the evaluation, see feedback.encode_pattern
         """ 
-        results = check_guess(guess, self.answer)
-        result_str = "".join([color_dict[evaluation] for evaluation in results])
-        self.guess_results.append(result_str)
+        code = get_pattern(guess, self.answer)
+        self.guesses.append(guess)
+        self.guess_results.append(code)
         if self.verbose:
-            print(f'{guess}\n{result_str}')
-        return results
+            print(f'{guess}\n{render_pattern(code)}')
+        return code
 
 
     def guess_results_as_string(self):
         """This method returns the entire results into a str
         Similar to what is seen when copying your wordle results"""
         string = ""
-        for result in self.guess_results:
-            string  += result + "\n"
+        for code in self.guess_results:
+            string  += render_pattern(code) + "\n"
         return string
 
 
     def get_answer(self):
         """This method returns the correct answer"""
-        return self.answer
\ No newline at end of file
+        return self.answer
+
+
+BACKENDS = ('local', 'http', 'browser')
+
+
+def new_game(backend = 'local', answer = None, **options):
+    """
+    This method creates a game on one of the backends the bots can play
+    on. Every backend has the check_guess and get_answer methods of Game,
+    and the ones that are not in process are only imported when used, so
+    choosing a backend never starts a browser or opens a connection early
+
+    Parameters
+    ----------
+    backend:    str
+                'local' for Game, 'http' for a game_server.HTTPGame or
+                'browser' for a browser.BrowserGame
+    answer:     str
+                correct answer, a random one if not given, ignored by the
+                browser backend on the live page
+    options:    dict
+                keyword arguments of the backend's class, i.e. server or url
+
+    Returns
+    -------
+    game:       object
+                game to play on
+    """
+    if backend == 'local':
+        return Game(answer, **options)
+    if backend == 'http':
+        from game_server import HTTPGame
+        return HTTPGame(answer = answer, **options)
+    if backend == 'browser':
+        from browser import BrowserGame
+        return BrowserGame(answer = answer, **options)
+    raise ValueError(f"unknown game backend {backend!r}, expected one of {', '.join(BACKENDS)}")
@@ -0,0 +1,398 @@
+import json
+import random
+import argparse
+import threading
+import http.client
+import numpy as np
+from time import perf_counter
+from urllib.parse import urlsplit
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from words import POSS_ANSWERS, is_word
+from feedback import ALL_CORRECT, MAX_GUESSES, render_pattern
+from game import Game
+from memo import GuessMemo
+
+HOST = "127.0.0.1"
+PORT = 8421
+SERVER_URL = f"http://{HOST}:{PORT}"
+MAX_GAMES = 100000
+
+
+class ServedGame(Game):
+    """This class is a game held by a GameServer, with a lock so its guesses are played one at a time"""
+    def __init__(self, answer = None):
+        super().__init__(answer)
+        self.lock = threading.Lock()
+
+
+class GameServer(ThreadingHTTPServer):
+    """
+    This class is a local HTTP Wordle server that holds many games at
+    once, each one a ServedGame, so the bots can be played over the network
+    and load tested. Games are created with POST /games, guessed with
+    POST /games/<id>/guesses and read with GET /games/<id>, which only
+    gives the answer once the game is over. GET /stats returns the
+    server's counters. The oldest games are dropped once max_games are held
+    Each guess carries its number, so a guess that is sent again after a
+    dropped connection gets the same reply instead of being played twice
+    """
+    daemon_threads = True
+
+    def __init__(self, address = (HOST, PORT), max_games = MAX_GAMES):
+        super().__init__(address, GameRequestHandler)
+        self.max_games = max_games
+        self.games = OrderedDict()
+        self.lock = threading.Lock()
+        self.next_id = 0
+        self.counters = {'games_created' : 0, 'guesses' : 0, 'games_dropped' : 0}
+
+    @property
+    def url(self):
+        """This method returns the url the server is listening on"""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def new_game(self, answer = None):
+        """This method creates a game and returns its id"""
+        game = ServedGame(answer)
+        with self.lock:
+            self.next_id += 1
+            game_id = str(self.next_id)
+            self.games[game_id] = game
+            self.counters['games_created'] += 1
+            while len(self.games) > self.max_games:
+                self.games.popitem(last = False)
+                self.counters['games_dropped'] += 1
+        return game_id
+
+    def get_game(self, game_id):
+        """This method returns a game by its id, or None"""
+        with self.lock:
+            return self.games.get(game_id)
+
+    def delete_game(self, game_id):
+        """This method drops a game, returning true if it existed"""
+        with self.lock:
+            return self.games.pop(game_id, None) is not None
+
+
+def game_over(game):
+    """This method returns true if a game was won or ran out of guesses"""
+    return len(game.guess_results) >= MAX_GUESSES or (game.guess_results and game.guess_results[-1] == ALL_CORRECT)
+
+
+def game_state(game_id, game):
+    """This method returns the json body describing a game, with the answer only once it is over"""
+    state = {'id' : game_id,
+                'codes' : list(game.guess_results),
+                'over' : game_over(game)}
+    if state['over']:
+        state['answer'] = game.get_answer()
+    return state
+
+
+class GameRequestHandler(BaseHTTPRequestHandler):
+    """This class handles the requests of a GameServer, keeping connections open between them"""
+    protocol_version = "HTTP/1.1"
+    # headers and body are written separately, so Nagle's algorithm would hold the body back for the client's delayed ack
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body):
+        """This method writes a json response"""
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_json(self):
+        """This method reads the json body of a request, or None if it is not valid"""
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            if length < 0:
+                raise ValueError
+        except ValueError:
+            # where the body ends is not known, so the connection is closed after replying
+            self.close_connection = True
+            return None
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            return None
+        return body if isinstance(body, dict) else None
+
+    def _path(self):
+        """This method returns the parts of the request path"""
+        return [part for part in urlsplit(self.path).path.split("/") if part]
+
+    def do_GET(self):
+        path = self._path()
+        if path == ["stats"]:
+            with self.server.lock:
+                return self._send(200, {**self.server.counters, 'games_held' : len(self.server.games)})
+        if len(path) == 2 and path[0] == "games":
+            game = self.server.get_game(path[1])
+            if game is None:
+                return self._send(404, {'error' : f"no game {path[1]}"})
+            with game.lock:
+                state = game_state(path[1], game)
+            return self._send(200, state)
+        self._send(404, {'error' : f"no route {self.path}"})
+
+    def do_POST(self):
+        path = self._path()
+        body = self._read_json()
+        if body is None:
+            return self._send(400, {'error' : "body is not a json object"})
+        if path == ["games"]:
+            answer = body.get('answer')
+            if answer is not None and not is_word(answer):
+                return self._send(400, {'error' : f"{answer} is not a five letter word"})
+            game_id = self.server.new_game(answer)
+            return self._send(201, {'id' : game_id})
+        if len(path) == 3 and path[0] == "games" and path[2] == "guesses":
+            game = self.server.get_game(path[1])
+            if game is None:
+                return self._send(404, {'error' : f"no game {path[1]}"})
+            guess = body.get('guess')
+            turn = body.get('turn')
+            # like a local Game, any word is scored, see feedback.get_pattern
+            if not is_word(guess):
+                return self._send(400, {'error' : f"{guess} is not a five letter word"})
+            if not isinstance(turn, int) or isinstance(turn, bool):
+                return self._send(400, {'error' : "turn must be the number of the guess"})
+            # guesses on the same game are played one at a time
+            with game.lock:
+                if turn <= len(game.guesses) and game.guesses[turn - 1] == guess:
+                    # the same guess sent again, i.e. after the reply was lost
+                    code = game.guess_results[turn - 1]
+                elif turn != len(game.guesses) + 1:
+                    return self._send(409, {'error' : f"game {path[1]} is on guess {len(game.guesses) + 1}, not {turn}"})
+                elif game_over(game):
+                    return self._send(409, {'error' : f"game {path[1]} is over"})
+                else:
+                    code = game.check_guess(guess)
+                    with self.server.lock:
+                        self.server.counters['guesses'] += 1
+                state = game_state(path[1], game)
+            return self._send(200, {'code' : code, 'pattern' : render_pattern(code), **state})
+        self._send(404, {'error' : f"no route {self.path}"})
+
+    def do_DELETE(self):
+        path = self._path()
+        if len(path) == 2 and path[0] == "games" and self.server.delete_game(path[1]):
+            return self._send(200, {'id' : path[1]})
+        self._send(404, {'error' : f"no route {self.path}"})
+
+
+class HTTPGame:
+    """
+    This class plays a game held by a GameServer. The game is created
+    on the server, over a connection that is kept open, when the first
+    guess is made. It can be used anywhere a game.Game is used, and
+    keeps the round trip time of every guess
+    """
+    def __init__(self, server = SERVER_URL, answer = None, timeout = 10):
+        self.server = server
+        self.answer = answer
+        self.timeout = timeout
+        self.game_id = None
+        self.guess_results = []
+        self.latencies = []
+        self._connection = None
+
+    def _request(self, method, path, body = None, retry = False):
+        """
+        This method sends a request to the server and returns its json
+        response, raising a ValueError if the server rejected it. Only
+        requests that can safely be played twice are sent again when the
+        kept open connection was dropped
+
+        Parameters
+        ----------
+        method:     str
+                    HTTP method
+        path:       str
+                    request path
+        body:       dict
+                    json body to send
+        retry:      bool
+                    true to send the request again on a new connection if it fails
+
+        Returns
+        -------
+        response:   dict
+                    json body of the response
+        """
+        if self._connection is None:
+            url = urlsplit(self.server)
+            self._connection = http.client.HTTPConnection(url.hostname, url.port, timeout = self.timeout)
+        data = json.dumps(body).encode() if body is not None else None
+        headers = {"Content-Type" : "application/json"} if data is not None else {}
+        try:
+            self._connection.request(method, path, data, headers)
+            response = self._connection.getresponse()
+            result = json.loads(response.read())
+        except (http.client.HTTPException, OSError):
+            self._connection.close()
+            if not retry:
+                raise
+            # the server closed the kept open connection, send the request again on a new one
+            self._connection.request(method, path, data, headers)
+            response = self._connection.getresponse()
+            result = json.loads(response.read())
+        if response.status >= 400:
+            raise ValueError(f"{method} {path} failed with {response.status}: {result.get('error')}")
+        return result
+
+    def check_guess(self, guess):
+        """
+        This method sends a guess to the server and returns its evaluation
+
+        Parameters
+        ----------
+        guess:      str
+                    guessed word
+
+        Returns
+        -------
+        code:       int
+                    pattern code of the evaluation, see feedback.encode_pattern
+        """
+        if self.game_id is None:
+            self.game_id = self._request("POST", "/games", {'answer' : self.answer})['id']
+        start = perf_counter()
+        # the guess number lets the server recognise a guess that is sent again
+        result = self._request("POST", f"/games/{self.game_id}/guesses", {'guess' : guess, 'turn' : len(self.guess_results) + 1}, retry = True)
+        self.latencies.append(perf_counter() - start)
+        self.guess_results.append(result['code'])
+        if result['over']:
+            self.answer = result['answer']
+        return result['code']
+
+    def get_answer(self):
+        """This method returns the correct answer, which the server only gives once the game is over"""
+        if self.answer is None and self.game_id is not None:
+            self.answer = self._request("GET", f"/games/{self.game_id}", retry = True).get('answer')
+        return self.answer
+
+    def close(self):
+        """This method closes the connection to the server"""
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+def start_server(host = HOST, port = 0, max_games = MAX_GAMES):
+    """This method starts a GameServer on a background thread, on a free port by default, and returns it"""
+    server = GameServer((host, port), max_games)
+    threading.Thread(target = server.serve_forever, daemon = True).start()
+    return server
+
+
+def load_test(n_games, first_guess = "slate", concurrency = 8, server = None, seed = None):
+    """
+    This method plays games of ConsoleWordleBot against a game server from
+    several threads at once and measures the round trip time of every guess.
+    A server is started in process if none is given
+
+    Parameters
+    ----------
+    n_games:        int
+                    number of games to play
+    first_guess:    str
+                    first guess of the bot
+    concurrency:    int
+                    number of games played at once
+    server:         str
+                    url of a running server
+    seed:           int
+                    seed used to pick the answers
+
+    Returns
+    -------
+    report:         dict
+                    games, guesses, wall time, throughput, round trip percentiles
+                    and the share of the wall time spent waiting on the server
+    """
+    from console_bot import ConsoleWordleBot
+    local_server = None
+    if server is None:
+        local_server = start_server()
+        server = local_server.url
+    answers = random.Random(seed).choices(POSS_ANSWERS.words, k = n_games)
+    local = threading.local()
+
+    def play(answer):
+        if not hasattr(local, 'bot'):
+            # every thread gets its own bot and memo, they are not shared between threads
+            local.bot = ConsoleWordleBot(first_guess, memo = GuessMemo())
+        game = HTTPGame(server, answer)
+        local.bot.play_game(game)
+        game.close()
+        return game.latencies, game.guess_results[-1] == ALL_CORRECT
+
+    start = perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        results = list(executor.map(play, answers))
+    wall_time = perf_counter() - start
+    if local_server:
+        local_server.shutdown()
+        local_server.server_close()
+
+    latencies = np.array([latency for game_latencies, _ in results for latency in game_latencies])
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {'games' : n_games,
+            'won' : sum(won for _, won in results),
+            'guesses' : len(latencies),
+            'wall_time' : wall_time,
+            'games_per_second' : n_games / wall_time,
+            'guesses_per_second' : len(latencies) / wall_time,
+            'round_trip_p50' : p50,
+            'round_trip_p95' : p95,
+            'round_trip_p99' : p99,
+            'round_trip_max' : latencies.max(),
+            'network_share' : latencies.sum() / (wall_time * concurrency)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description = "Serve Wordle games over HTTP, or load test the bot against a server")
+    commands = parser.add_subparsers(dest = "command", required = True)
+    serve = commands.add_parser("serve", help = "run a game server")
+    serve.add_argument("--host", default = HOST)
+    serve.add_argument("--port", type = int, default = PORT)
+    serve.add_argument("--max-games", type = int, default = MAX_GAMES, help = "number of games held before the oldest are dropped")
+    load = commands.add_parser("load", help = "play games against a server and report round trip times")
+    load.add_argument("n_games", type = int)
+    load.add_argument("--first-guess", default = "slate")
+    load.add_argument("--concurrency", type = int, default = 8, help = "number of games played at once")
+    load.add_argument("--server", default = None, help = "url of a running server, one is started in process if not given")
+    load.add_argument("--seed", type = int, default = None, help = "seed used to pick the answers")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        server = GameServer((args.host, args.port), args.max_games)
+        print(f"Serving games on {server.url}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            server.server_close()
+        return
+
+    report = load_test(args.n_games, args.first_guess, args.concurrency, args.server, args.seed)
+    print(f"{report['games']} games, {report['won']} won, {report['guesses']} guesses in {report['wall_time']:.2f} seconds")
+    print(f"{report['games_per_second']:.1f} games / second, {report['guesses_per_second']:.1f} guesses / second")
+    print(f"Round trip: p50 {report['round_trip_p50'] * 1000:.2f} ms, p95 {report['round_trip_p95'] * 1000:.2f} ms, "
+            f"p99 {report['round_trip_p99'] * 1000:.2f} ms, max {report['round_trip_max'] * 1000:.2f} ms")
+    print(f"{report['network_share'] * 100:.1f}% of the time was spent waiting on the server")
+
+
+if __name__ == '__main__':
+    main()
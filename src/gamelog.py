@@ -0,0 +1,172 @@
+import os
+import json
+
+from words import write_atomic
+from feedback import MAX_GUESSES
+
+LOG_FILE = "games.jsonl"
+
+
+def new_stats():
+    """This method returns the running aggregates of an empty game log"""
+    return {'games_played' : 0,
+            'wins' : 0,
+            'cur_streak' : 0,
+            'max_streak' : 0,
+            'total_guesses' : 0,
+            'distribution' : {str(n_guesses) : 0 for n_guesses in range(1, MAX_GUESSES + 1)},
+            'offset' : 0}
+
+
+def add_game(stats, game):
+    """
+    This method folds one game into the running aggregates in constant time
+
+    Parameters
+    ----------
+    stats:      dict
+                aggregates from new_stats
+    game:       dict
+                game record with 'won' and 'num_guesses'
+    """
+    stats['games_played'] += 1
+    if game['won']:
+        stats['wins'] += 1
+        stats['cur_streak'] += 1
+        stats['max_streak'] = max(stats['max_streak'], stats['cur_streak'])
+        stats['total_guesses'] += game['num_guesses']
+        key = str(game['num_guesses'])
+        stats['distribution'][key] = stats['distribution'].get(key, 0) + 1
+    else:
+        stats['cur_streak'] = 0
+
+
+class GameLog:
+    """
+    This class is the bot's game history. Every game is appended to a
+    json lines file, and the aggregates shown in the console and the
+    Twitter bio are kept in a small snapshot next to it, so recording
+    a game and reading the stats take the same time however many games
+    have been played. The snapshot records how much of the log it covers,
+    and any games after that are replayed when the log is opened, so a
+    crash between the two writes loses nothing. A data.json file from
+    older versions of the bot is migrated the first time the log is opened
+    """
+    def __init__(self, filename = LOG_FILE, legacy_file = None, compact_every = 256):
+        self.filename = filename
+        self.stats_file = f"{os.path.splitext(filename)[0]}_stats.json"
+        self.compact_every = compact_every
+        if not os.path.exists(self.filename) and legacy_file and os.path.exists(legacy_file):
+            self._migrate(legacy_file)
+        self.stats = self._load_stats()
+
+    def _migrate(self, legacy_file):
+        """This method writes the game history of a data.json file to a new log"""
+        with open(legacy_file, encoding = "utf-8") as file:
+            history = json.load(file)['data']['game_history']
+        games = []
+        for key, game in history.items():
+            n_guesses = sum(1 for field in game if field.startswith("guess_"))
+            games.append({'wordle' : key, 'won' : game['won'], 'num_guesses' : n_guesses,
+                            **{field : value for field, value in game.items() if field != 'won'}})
+        self._rewrite(games)
+
+    def _rewrite(self, games):
+        """This method replaces the log and its snapshot with a list of games"""
+        text = "".join(json.dumps(game, ensure_ascii = False) + "\n" for game in games)
+        write_atomic(self.filename, text)
+        stats = new_stats()
+        for game in games:
+            add_game(stats, game)
+        stats['offset'] = len(text.encode("utf-8"))
+        write_atomic(self.stats_file, json.dumps(stats, indent = 4))
+
+    def _load_stats(self):
+        """
+        This method reads the snapshot and replays the games logged after it.
+        A last line cut off by a crash is dropped from the log
+
+        Returns
+        -------
+        stats:      dict
+                    aggregates of every game in the log
+        """
+        if not os.path.exists(self.filename):
+            return new_stats()
+        stats = new_stats()
+        if os.path.exists(self.stats_file):
+            with open(self.stats_file, encoding = "utf-8") as file:
+                stats = json.load(file)
+        if stats['offset'] > os.path.getsize(self.filename):
+            stats = new_stats()
+        offset = stats['offset']
+        with open(self.filename, 'rb') as file:
+            file.seek(offset)
+            for line in file:
+                try:
+                    game = json.loads(line)
+                except ValueError:
+                    break
+                add_game(stats, game)
+                offset += len(line)
+        if offset != os.path.getsize(self.filename):
+            with open(self.filename, 'r+b') as file:
+                file.truncate(offset)
+        if offset != stats['offset']:
+            stats['offset'] = offset
+            write_atomic(self.stats_file, json.dumps(stats, indent = 4))
+        return stats
+
+    def append(self, game):
+        """
+        This method records a game. The game is appended and synced to
+        the log before the snapshot is replaced
+
+        Parameters
+        ----------
+        game:       dict
+                    game record with 'wordle', 'won', 'num_guesses' and the
+                    guess_i and eval_i of every guess
+        """
+        line = (json.dumps(game, ensure_ascii = False) + "\n").encode("utf-8")
+        with open(self.filename, 'ab') as outfile:
+            outfile.write(line)
+            outfile.flush()
+            os.fsync(outfile.fileno())
+        add_game(self.stats, game)
+        self.stats['offset'] += len(line)
+        write_atomic(self.stats_file, json.dumps(self.stats, indent = 4))
+        if self.compact_every and self.stats['games_played'] % self.compact_every == 0:
+            self.compact()
+
+    def games(self):
+        """This method returns every game in the log, in the order they were played"""
+        if not os.path.exists(self.filename):
+            return []
+        with open(self.filename, encoding = "utf-8") as file:
+            return [json.loads(line) for line in file]
+
+    def compact(self):
+        """
+        This method rewrites the log keeping only the last record of each
+        wordle, so a day that was replayed counts once, and recomputes the
+        aggregates from scratch
+        """
+        games = {}
+        for game in self.games():
+            games.pop(game['wordle'], None)
+            games[game['wordle']] = game
+        self._rewrite(list(games.values()))
+        self.stats = self._load_stats()
+
+    def win_rate(self):
+        """This method returns the percentage of games won, rounded"""
+        if self.stats['games_played'] == 0:
+            return 0
+        return round(self.stats['wins'] / self.stats['games_played'] * 100)
+
+    def avg_guesses(self):
+        """This method returns the average number of guesses of the games won"""
+        if self.stats['wins'] == 0:
+            return 0
+        return self.stats['total_guesses'] / self.stats['wins']
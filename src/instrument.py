@@ -0,0 +1,106 @@
+import cProfile
+import pstats
+import tracemalloc
+
+HOOKS = []
+
+
+def add_hook(hook):
+    """
+    This method registers a function that is called with a record
+    for every turn the bots play. While no hooks are registered the
+    bots skip all timing and record keeping
+
+    Parameters
+    ----------
+    hook:       function
+                function taking a single dict, see ConsoleWordleBot.play_game
+                for its keys
+    """
+    HOOKS.append(hook)
+
+
+def remove_hook(hook):
+    """This method unregisters a hook added with add_hook"""
+    if hook in HOOKS:
+        HOOKS.remove(hook)
+
+
+def emit(record):
+    """This method passes a turn record to every registered hook"""
+    for hook in HOOKS:
+        hook(record)
+
+
+class TurnRecorder:
+    """
+    This class is a hook that keeps every turn record it is called with,
+    or with keep set to false only their running totals
+    It can be used as a context manager to register it for a block
+    """
+    def __init__(self, keep = True):
+        self.keep = keep
+        self.records = []
+        self.totals = {'turns' : 0,
+                        'guesses_scored' : 0,
+                        'guesses_pruned' : 0,
+                        'filter_time' : 0.0,
+                        'score_time' : 0.0,
+                        'lookahead_states' : 0,
+                        'lookahead_time' : 0.0,
+                        'cache_hits' : 0}
+
+    def __call__(self, record):
+        if self.keep:
+            self.records.append(record)
+        self.totals['turns'] += 1
+        for key in ['guesses_scored', 'guesses_pruned', 'filter_time', 'score_time', 'lookahead_states', 'lookahead_time']:
+            self.totals[key] += record[key]
+        self.totals['cache_hits'] += 1 if record['cache'] else 0
+
+    def __enter__(self):
+        add_hook(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        remove_hook(self)
+
+    def summary(self):
+        """This method returns the totals of the recorded turns"""
+        return dict(self.totals)
+
+
+class Profiler:
+    """
+    This class captures a cProfile profile, a tracemalloc snapshot,
+    or both, around a block and writes them to files when it ends
+    """
+    def __init__(self, profile_file = None, memory_file = None, limit = 40):
+        self.profile_file = profile_file
+        self.memory_file = memory_file
+        self.limit = limit
+        self.profile = None
+
+    def __enter__(self):
+        if self.memory_file:
+            tracemalloc.start()
+        if self.profile_file:
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.profile:
+            self.profile.disable()
+            self.profile.dump_stats(self.profile_file)
+            with open(f"{self.profile_file}.txt", 'w') as outfile:
+                stats = pstats.Stats(self.profile, stream = outfile)
+                stats.sort_stats("cumulative").print_stats(self.limit)
+        if self.memory_file:
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            with open(self.memory_file, 'w') as outfile:
+                outfile.write(f"Current: {current / 1024 ** 2:.2f} MiB\nPeak: {peak / 1024 ** 2:.2f} MiB\n\n")
+                for stat in snapshot.statistics("lineno")[:self.limit]:
+                    outfile.write(f"{stat}\n")
@@ -0,0 +1,271 @@
+import os
+import sys
+import json
+import argparse
+import numpy as np
+from multiprocessing import Pool, Value
+
+from words import WORDBANK, POSS_ANSWERS
+from feedback import CACHE_DIR, ALL_CORRECT, MAX_GUESSES, load_matrix
+from candidates import all_candidates
+from entropy import score_guesses
+from utils import SOLVER_SETTINGS, rank_candidates
+from memo import GuessMemo
+from store import store_version
+from simulate import read_results
+
+LOSS_GUESSES = 7
+TOP_N = 25
+
+_threshold = None
+_memo = None
+
+
+def init_worker(threshold):
+    """
+    This method sets up a process that evaluates openers. The threshold
+    is shared with the parent, which lowers it as openers finish
+    """
+    global _threshold, _memo
+    _threshold = threshold
+    # play_out only needs the best guess of each state
+    _memo = GuessMemo(maxsize = 1 << 18, keep = 1)
+    load_matrix()
+
+
+def answer_mask():
+    """This method returns a boolean array of which word bank words are possible answers"""
+    is_answer = np.zeros(len(WORDBANK), dtype = bool)
+    is_answer[[WORDBANK.index[answer] for answer in POSS_ANSWERS]] = True
+    return is_answer
+
+
+def cell_bound(n_answers):
+    """
+    This method returns the fewest guesses, in total, that the answers
+    sharing a pattern of the first guess can be solved in. Only one of
+    them can be the second guess, every other one takes at least three
+    """
+    return 3 * n_answers - 1
+
+
+def play_out(guess_idx, candidates, is_answer, prev_guesses, depth, settings, distribution):
+    """
+    This method plays a guess against every possible answer in a candidate
+    set at once, the same way ConsoleWordleBot plays each of them, and adds
+    the number of guesses each answer took to the distribution
+
+    Parameters
+    ----------
+    guess_idx:      int
+                    word bank index of the guess
+    candidates:     np.ndarray
+                    sorted word bank indices of the possible words
+    is_answer:      np.ndarray
+                    boolean array of which words are possible answers
+    prev_guesses:   list
+                    list of previous guesses
+    depth:          int
+                    number of the guess, starting at 1
+    settings:       dict
+                    solver settings
+    distribution:   np.ndarray
+                    number of answers solved in each number of guesses, where
+                    the last entry counts the answers that were lost
+    """
+    codes = load_matrix()[guess_idx][candidates]
+    answer_codes, counts = np.unique(codes[is_answer[candidates]], return_counts = True)
+    prev_guesses = [*prev_guesses, WORDBANK.words[guess_idx]]
+    for code, count in zip(answer_codes.tolist(), counts.tolist()):
+        if code == ALL_CORRECT:
+            distribution[depth] += count
+            continue
+        if depth == MAX_GUESSES:
+            distribution[LOSS_GUESSES] += count
+            continue
+        sub_candidates = candidates[codes == code]
+        ranked_idx, _ = rank_candidates(sub_candidates, prev_guesses, [], _memo, settings = settings)
+        play_out(ranked_idx[0], sub_candidates, is_answer, prev_guesses, depth + 1, settings, distribution)
+
+
+def evaluate_opener(task):
+    """
+    This method finds the exact number of guesses an opener takes over
+    every possible answer. The answers are played one pattern of the
+    opener at a time, largest first, and the opener is cut off once the
+    guesses played so far plus the fewest the rest can take is more than
+    the shared threshold
+
+    Parameters
+    ----------
+    task:       tuple
+                (word, settings)
+
+    Returns
+    -------
+    record:     dict
+                {'word', 'status', 'total', 'games', 'distribution'} where status is
+                'done' with the exact total, or 'cut' with a lower bound on it
+    """
+    word, settings = task
+    guess_idx = WORDBANK.index[word]
+    is_answer = answer_mask()
+    candidates = all_candidates()
+    codes = load_matrix()[guess_idx][candidates]
+    answer_codes, counts = np.unique(codes[is_answer[candidates]], return_counts = True)
+    order = np.argsort(-counts, kind = 'stable')
+    distribution = np.zeros(LOSS_GUESSES + 1, dtype = np.int64)
+    remaining_bound = sum(1 if code == ALL_CORRECT else cell_bound(count) for code, count in zip(answer_codes.tolist(), counts.tolist()))
+    for code, count in zip(answer_codes[order].tolist(), counts[order].tolist()):
+        played = int(distribution @ np.arange(LOSS_GUESSES + 1))
+        if played + remaining_bound > _threshold.value:
+            return {'word' : word, 'status' : 'cut', 'total' : played + remaining_bound,
+                    'games' : int(distribution.sum()), 'distribution' : None}
+        if code == ALL_CORRECT:
+            distribution[1] += count
+            remaining_bound -= 1
+            continue
+        sub_candidates = candidates[codes == code]
+        ranked_idx, _ = rank_candidates(sub_candidates, [word], [], _memo, settings = settings)
+        play_out(ranked_idx[0], sub_candidates, is_answer, [word], 2, settings, distribution)
+        remaining_bound -= cell_bound(count)
+    return {'word' : word, 'status' : 'done', 'total' : int(distribution @ np.arange(LOSS_GUESSES + 1)),
+            'games' : int(distribution.sum()), 'distribution' : distribution[1:].tolist()}
+
+
+def opener_order(words):
+    """This method orders openers from the highest entropy over the possible answers to the lowest"""
+    scores = score_guesses([WORDBANK.index[word] for word in words], np.flatnonzero(answer_mask()))
+    return [words[i] for i in np.argsort(-scores, kind = 'stable')]
+
+
+def top_threshold(records, top_n):
+    """This method returns the total of the top_n'th best finished opener, or infinity"""
+    totals = sorted(record['total'] for record in records.values() if record['status'] == 'done')
+    return totals[top_n - 1] if len(totals) >= top_n else np.inf
+
+
+def checkpoint_filename(settings):
+    """This method returns where an opener search is checkpointed, one file per word bank and settings"""
+    return os.path.join(CACHE_DIR, f"openers_{store_version(settings)}.jsonl")
+
+
+def leaderboard(records):
+    """
+    This method sorts the finished openers from the fewest average guesses
+    to the most, where a lost game counts as LOSS_GUESSES guesses
+
+    Parameters
+    ----------
+    records:    dict
+                {word : record} from evaluate_opener
+
+    Returns
+    -------
+    board:      list
+                list of {'rank', 'word', 'avg_guesses', 'win_rate', 'distribution'} dicts
+    """
+    done = sorted((record for record in records.values() if record['status'] == 'done'), key = lambda record: (record['total'], record['word']))
+    return [{'rank' : rank,
+                'word' : record['word'],
+                'avg_guesses' : record['total'] / record['games'],
+                'win_rate' : (1 - record['distribution'][-1] / record['games']) * 100,
+                'distribution' : record['distribution']}
+            for rank, record in enumerate(done, 1)]
+
+
+def search(words = None, top_n = TOP_N, workers = 1, settings = None, filename = "leaderboard.json", checkpoint = None):
+    """
+    This method ranks every word in the word bank as an opener by its exact
+    average guesses over every possible answer. Openers are evaluated from
+    the most promising to the least, and once top_n have finished any opener
+    that can no longer beat the top_n'th is cut off. Every evaluated opener is
+    appended to a checkpoint file, so an interrupted search resumes where it
+    stopped; cut openers are evaluated again if a larger top_n needs them
+
+    Parameters
+    ----------
+    words:          list
+                    openers to evaluate, every word bank word if not given
+    top_n:          int
+                    size of the leaderboard that has to be exact
+    workers:        int
+                    number of processes to evaluate openers on
+    settings:       dict
+                    solver settings, see utils.SOLVER_SETTINGS
+    filename:       str
+                    json file the sorted leaderboard is written to
+    checkpoint:     str
+                    json lines file to resume from, checkpoint_filename(settings) if not given
+
+    Returns
+    -------
+    board:          list
+                    leaderboard of the finished openers, see leaderboard
+    """
+    settings = {**SOLVER_SETTINGS, **(settings or {})}
+    if checkpoint is None:
+        checkpoint = checkpoint_filename(settings)
+    os.makedirs(os.path.dirname(checkpoint) or ".", exist_ok = True)
+    records = {record['word'] : record for record in read_results(checkpoint)}
+    threshold = Value('d', top_threshold(records, top_n), lock = False)
+    todo = [word for word in opener_order(words or list(WORDBANK.words))
+            if word not in records or (records[word]['status'] == 'cut' and records[word]['total'] <= threshold.value)]
+    print(f"Ranking {len(todo)} openers, {len(records)} already in {checkpoint}\n")
+
+    tasks = [(word, settings) for word in todo]
+    init_worker(threshold)
+    if workers > 1:
+        pool = Pool(workers, initializer = init_worker, initargs = (threshold,))
+        results = pool.imap_unordered(evaluate_opener, tasks)
+    else:
+        pool = None
+        results = map(evaluate_opener, tasks)
+    n_cut = 0
+    try:
+        with open(checkpoint, 'a') as outfile:
+            for i, record in enumerate(results, 1):
+                outfile.write(json.dumps(record) + "\n")
+                outfile.flush()
+                records[record['word']] = record
+                n_cut += record['status'] == 'cut'
+                threshold.value = top_threshold(records, top_n)
+                print(f"\r{i} / {len(tasks)} openers, {n_cut} cut off", end = "")
+    except KeyboardInterrupt:
+        print(f"\nStopped, run again to resume from {checkpoint}")
+        if pool:
+            pool.terminate()
+        return None
+    if pool:
+        pool.close()
+        pool.join()
+
+    board = leaderboard(records)
+    with open(filename, 'w') as outfile:
+        json.dump(board, outfile, indent = 4)
+    print(f"\n\n{'rank':<6}{'word':<8}{'avg guesses':>12}{'win rate':>10}")
+    for entry in board[:top_n]:
+        print(f"{entry['rank']:<6}{entry['word']:<8}{entry['avg_guesses']:>12.4f}{entry['win_rate']:>9.2f}%")
+    print(f"\nLeaderboard of {len(board)} openers written to {filename}")
+    return board
+
+
+def main():
+    parser = argparse.ArgumentParser(description = "Rank every word bank word as an opener")
+    parser.add_argument("words", nargs = "*", help = "openers to rank, every word bank word if none are given")
+    parser.add_argument("--top", type = int, default = TOP_N, help = "size of the leaderboard that has to be exact")
+    parser.add_argument("--workers", type = int, default = os.cpu_count(), help = "number of processes to evaluate openers on")
+    parser.add_argument("--out", default = "leaderboard.json", help = "json file to write the sorted leaderboard to")
+    parser.add_argument("--checkpoint", default = None, help = "json lines file to resume from")
+    parser.add_argument("--prune", action = "store_true", help = "skip guesses that cannot beat the best one found")
+    parser.add_argument("--normal", action = "store_true", help = "play normal mode, guessing from the whole word bank")
+    args = parser.parse_args()
+    unknown = [word for word in args.words if word not in WORDBANK.index]
+    if unknown:
+        sys.exit(f"Not in the word bank: {', '.join(unknown)}")
+    settings = {'prune' : args.prune, 'corpus' : 'wordbank' if args.normal else 'candidates'}
+    search(args.words, args.top, args.workers, settings, args.out, args.checkpoint)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+import numpy as np
+
+from feedback import ALL_CORRECT, load_matrix
+from candidates import all_candidates, candidate_mask
+from entropy import rank_guesses_pruned
+
+TOP_K = 10
+DEPTH = 2
+COST_DECIMALS = 12
+
+
+def partition(guess, answer_idx, matrix):
+    """
+    This method splits a set of possible answers by the pattern
+    a guess gives against each of them
+
+    Parameters
+    ----------
+    guess:      int
+                word bank index of the guess
+    answer_idx: np.ndarray
+                sorted word bank indices of the possible answers
+    matrix:     np.ndarray
+                feedback matrix
+
+    Returns
+    -------
+    codes:      np.ndarray
+                pattern code of each part
+    parts:      list
+                sorted word bank indices of the answers giving each pattern
+    """
+    codes = matrix[guess, answer_idx]
+    order = np.argsort(codes, kind = 'stable')
+    sorted_codes = codes[order]
+    starts = np.flatnonzero(np.diff(sorted_codes)) + 1
+    return sorted_codes[np.r_[0, starts]], np.split(answer_idx[order], starts)
+
+
+class Lookahead:
+    """
+    This class scores guesses by the expected number of candidates left
+    after looking a number of moves ahead, taking the best of the top k
+    entropy guesses at every later move. Candidate sets reached through
+    different guesses are only solved once, so branches that share a
+    partition share its value
+    """
+    def __init__(self, hard = True, top_k = TOP_K, matrix = None):
+        self.hard = hard
+        self.top_k = top_k
+        self.matrix = load_matrix() if matrix is None else matrix
+        self.values = {}
+        self.stats = {'states' : 0, 'reused' : 0, 'guesses_scored' : 0}
+
+    def top_guesses(self, answer_idx):
+        """
+        This method returns the top k entropy guesses for a set of possible
+        answers. In hard mode these are picked from the answers themselves,
+        otherwise from the whole word bank with ties going to the answers
+        """
+        if self.hard:
+            guess_idx, prefer = answer_idx, None
+        else:
+            guess_idx = all_candidates()
+            prefer = candidate_mask(answer_idx)
+        ranked_idx, _, stats = rank_guesses_pruned(guess_idx, answer_idx, self.top_k, self.matrix, prefer = prefer)
+        self.stats['guesses_scored'] += stats['scored']
+        return ranked_idx[:self.top_k]
+
+    def value(self, answer_idx, depth):
+        """
+        This method returns the expected number of candidates left after
+        depth more moves, when every move is the best of the top k guesses
+
+        Parameters
+        ----------
+        answer_idx: np.ndarray
+                    sorted word bank indices of the possible answers
+        depth:      int
+                    number of moves left to look at
+
+        Returns
+        -------
+        value:      float
+                    expected number of candidates left
+        """
+        if depth == 0:
+            return len(answer_idx)
+        if len(answer_idx) <= 1:
+            return 0.0
+        key = (answer_idx.tobytes(), depth)
+        if key in self.values:
+            self.stats['reused'] += 1
+            return self.values[key]
+        self.stats['states'] += 1
+        value = min(self.cost(guess, answer_idx, depth) for guess in self.top_guesses(answer_idx))
+        self.values[key] = value
+        return value
+
+    def cost(self, guess, answer_idx, depth):
+        """
+        This method returns the expected number of candidates left after
+        a guess and depth - 1 more moves. The answer that matches the
+        guess is solved, so it leaves none
+
+        Parameters
+        ----------
+        guess:      int
+                    word bank index of the guess
+        answer_idx: np.ndarray
+                    sorted word bank indices of the possible answers
+        depth:      int
+                    number of moves to look at, including this guess
+
+        Returns
+        -------
+        cost:       float
+                    expected number of candidates left
+        """
+        codes, parts = partition(guess, answer_idx, self.matrix)
+        total = sum(len(part) * self.value(part, depth - 1) for code, part in zip(codes, parts) if code != ALL_CORRECT)
+        return total / len(answer_idx)
+
+
+def rank_guesses_lookahead(ranked_idx, ranked_scores, answer_idx, hard = True, top_k = TOP_K, depth = DEPTH, matrix = None):
+    """
+    This method re-ranks the top k guesses of an entropy ranking by the
+    expected number of candidates left after looking depth moves ahead.
+    Guesses with the same expected number keep their entropy order, and
+    the guesses after the top k are left as they are
+
+    Parameters
+    ----------
+    ranked_idx:     np.ndarray
+                    word bank indices of the guesses from best to worst entropy
+    ranked_scores:  np.ndarray
+                    entropy of each guess in ranked_idx
+    answer_idx:     np.ndarray
+                    sorted word bank indices of the possible answers
+    hard:           bool
+                    true if later guesses must be possible answers
+    top_k:          int
+                    number of guesses looked at for every move
+    depth:          int
+                    number of moves looked at, including the next guess
+    matrix:         np.ndarray
+                    feedback matrix, loaded from the cache if not given
+
+    Returns
+    -------
+    ranked_idx:     np.ndarray
+                    word bank indices of the guesses from best to worst
+    ranked_scores:  np.ndarray
+                    entropy of each guess in ranked_idx
+    stats:          dict
+                    {'states', 'reused', 'guesses_scored'} number of candidate sets
+                    solved, number of times a solved set was reused, and number of
+                    guesses scored to pick the top k of each set
+    """
+    answer_idx = np.asarray(answer_idx, dtype = np.intp)
+    lookahead = Lookahead(hard, top_k, matrix)
+    if len(answer_idx) <= 2 or len(ranked_idx) <= 1:
+        return ranked_idx, ranked_scores, lookahead.stats
+    top = min(top_k, len(ranked_idx))
+    costs = np.array([lookahead.cost(guess, answer_idx, depth) for guess in ranked_idx[:top]])
+    order = np.argsort(np.round(costs, COST_DECIMALS), kind = 'stable')
+    order = np.r_[order, np.arange(top, len(ranked_idx))]
+    return ranked_idx[order], ranked_scores[order], lookahead.stats
@@ -0,0 +1,102 @@
+import json
+import hashlib
+import numpy as np
+from collections import OrderedDict
+
+
+def state_key(candidates, guess_idx, settings):
+    """
+    This method returns a stable hash of everything a guess decision depends on
+
+    Parameters
+    ----------
+    candidates:     np.ndarray
+                    sorted word bank indices of the possible words
+    guess_idx:      np.ndarray
+                    word bank indices of the words that may be guessed,
+                    i.e. the corpus without any excluded words
+    settings:       dict
+                    solver settings that change the decision
+
+    Returns
+    -------
+    key:            str
+                    hex digest identifying the state
+    """
+    digest = hashlib.blake2b(digest_size = 16)
+    digest.update(np.asarray(candidates, dtype = np.int64).tobytes())
+    digest.update(b"|")
+    digest.update(np.asarray(guess_idx, dtype = np.int64).tobytes())
+    digest.update(b"|")
+    digest.update(json.dumps(settings, sort_keys = True).encode())
+    return digest.hexdigest()
+
+
+class GuessMemo:
+    """
+    This class is a bounded least recently used cache of guess decisions
+    Many games reach the same candidate set, i.e. every game with the same
+    pattern for the first guess, so their decisions only need to be made once
+    Only the best keep guesses of each ranking are stored, like SolverStore,
+    so an entry takes the same memory however many words were ranked
+    """
+    def __init__(self, maxsize = 4096, keep = 64):
+        self.maxsize = maxsize
+        self.keep = keep
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """
+        This method returns the decision stored for a key, or None if there
+        is none, and marks it as recently used
+
+        Parameters
+        ----------
+        key:        str
+                    key from state_key
+        """
+        if key in self.entries:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return self.entries[key]
+        self.misses += 1
+        return None
+
+    def put(self, key, value):
+        """
+        This method stores a decision, evicting the least recently used
+        one if the memo is full
+
+        Parameters
+        ----------
+        key:        str
+                    key from state_key
+        value:      tuple
+                    (ranked_idx, ranked_scores) arrays of the decision
+        """
+        # copied so the entry does not hold on to the full arrays
+        self.entries[key] = tuple(np.array(ranked[:self.keep]) for ranked in value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last = False)
+            self.evictions += 1
+
+    def clear(self):
+        """This method empties the memo and resets its counters"""
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def stats(self):
+        """This method returns the memo's counters"""
+        return {'size' : len(self.entries),
+                'hits' : self.hits,
+                'misses' : self.misses,
+                'evictions' : self.evictions}
+
+
+GUESS_MEMO = GuessMemo()
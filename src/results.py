@@ -0,0 +1,229 @@
+import numpy as np
+
+from words import WORDBANK
+from feedback import N_PATTERNS, MAX_GUESSES, render_pattern
+
+CHUNK_SIZE = 4096
+
+UNKNOWN = -1
+
+RESULT_DTYPE = np.dtype([('answer', '<i2'),
+                            ('num_guesses', 'u1'),
+                            ('won', '?'),
+                            ('time', '<f4'),
+                            ('guesses', '<i2', (MAX_GUESSES,)),
+                            ('codes', 'u1', (MAX_GUESSES,))])
+
+
+class GameResults:
+    """
+    This class stores the results of a bot's games as fixed size records,
+    one numpy column per field, and keeps the win rate, guess distribution,
+    time and lost on counts as running totals. Only the last chunk of games
+    is held in memory; older ones are appended to a spill file if one is
+    given, and dropped otherwise, so memory stays flat however many games
+    are played. Games can be read back as the dicts the bots used to keep
+    Words are stored as word bank indices, words outside the word bank,
+    i.e. a first guess like soare, as negative ids into extra_words, and
+    an answer that is not known, i.e. on the live page, as UNKNOWN
+    """
+    def __init__(self, spill_file = None, chunk_size = CHUNK_SIZE):
+        self.spill_file = spill_file
+        self.chunk_size = chunk_size
+        self._buffer = np.zeros(chunk_size, dtype = RESULT_DTYPE)
+        self._n_buffered = 0
+        self._offset = 0
+        self.wins = 0
+        self.losses = 0
+        self.total_guesses = 0
+        self.total_time = 0.0
+        self.distribution = np.zeros(MAX_GUESSES + 1, dtype = np.int64)
+        self.lost_on = np.zeros(len(WORDBANK), dtype = np.int64)
+        self.extra_words = []
+        self.lost_on_extra = {}
+        if spill_file:
+            open(spill_file, 'wb').close()
+
+    def __getstate__(self):
+        # only the buffered games travel between processes
+        state = self.__dict__.copy()
+        state['_buffer'] = self._buffer[:self._n_buffered].copy()
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        buffer = np.zeros(self.chunk_size, dtype = RESULT_DTYPE)
+        buffer[:self._n_buffered] = self._buffer
+        self._buffer = buffer
+
+    def __len__(self):
+        return self._offset + self._n_buffered
+
+    def flush(self):
+        """This method spills the buffered games to disk, or drops them, and empties the buffer"""
+        if self.spill_file:
+            with open(self.spill_file, 'ab') as outfile:
+                self._buffer[:self._n_buffered].tofile(outfile)
+        self._offset += self._n_buffered
+        self._n_buffered = 0
+
+    def _word_id(self, word, add = True):
+        """
+        This method returns the id a word is stored under, adding it to
+        extra_words if it is not in the word bank, or None if add is false
+        and the word was never stored
+        """
+        if word is None:
+            return UNKNOWN
+        if word in WORDBANK.index:
+            return WORDBANK.index[word]
+        if word not in self.extra_words:
+            if not add:
+                return None
+            self.extra_words.append(word)
+        return UNKNOWN - 1 - self.extra_words.index(word)
+
+    def _word(self, word_id):
+        """This method returns the word stored under an id, see _word_id"""
+        if word_id == UNKNOWN:
+            return None
+        return WORDBANK.words[word_id] if word_id >= 0 else self.extra_words[UNKNOWN - 1 - word_id]
+
+    def _add_records(self, records):
+        """This method folds an array of records into the totals and the buffer"""
+        won = records['won']
+        self.wins += int(won.sum())
+        self.losses += int((~won).sum())
+        self.total_guesses += int(records['num_guesses'][won].sum())
+        self.total_time += float(records['time'].sum())
+        self.distribution += np.bincount(records['num_guesses'][won], minlength = MAX_GUESSES + 1)[:MAX_GUESSES + 1]
+        lost = records['answer'][~won]
+        np.add.at(self.lost_on, lost[lost >= 0], 1)
+        for word_id in lost[lost < UNKNOWN].tolist():
+            word = self._word(word_id)
+            self.lost_on_extra[word] = self.lost_on_extra.get(word, 0) + 1
+        for start in range(0, len(records), self.chunk_size):
+            chunk = records[start:start + self.chunk_size]
+            if self._n_buffered + len(chunk) > self.chunk_size:
+                self.flush()
+            self._buffer[self._n_buffered:self._n_buffered + len(chunk)] = chunk
+            self._n_buffered += len(chunk)
+
+    def add(self, answer, guesses, codes, won, elapsed):
+        """
+        This method records a game
+
+        Parameters
+        ----------
+        answer:     str
+                    correct answer, or None if it is not known, in which case
+                    the last guess of a game that was won is used
+        guesses:    list
+                    list of guesses made
+        codes:      list
+                    pattern code of each guess
+        won:        bool
+                    true if the last guess is the answer
+        elapsed:    float
+                    seconds the game took
+        """
+        record = np.zeros(1, dtype = RESULT_DTYPE)
+        if answer is None and won:
+            answer = guesses[-1]
+        record['answer'] = self._word_id(answer)
+        record['num_guesses'] = len(guesses)
+        record['won'] = won
+        record['time'] = elapsed
+        record['guesses'][0, :len(guesses)] = [self._word_id(guess) for guess in guesses]
+        record['codes'][0, :len(codes)] = codes
+        self._add_records(record)
+
+    def add_game(self, game):
+        """This method records a game given as a dict, see game"""
+        n_guesses = game['num_guesses']
+        guesses = [game[f"guess_{i+1}"] for i in range(n_guesses)]
+        codes = [_ROW_CODES[game[f"eval_{i+1}"]] for i in range(n_guesses)]
+        self.add(game['answer'], guesses, codes, game['won'], game['time_to_solve'])
+
+    def extend(self, other):
+        """This method records every game of another GameResults, i.e. one from a worker process"""
+        if other._offset:
+            raise ValueError("only results that kept every game in memory can be merged")
+        records = other._buffer[:other._n_buffered].copy()
+        for field in ['answer', 'guesses']:
+            word_ids = other._buffer[field][:other._n_buffered]
+            for word_id in np.unique(word_ids[word_ids < UNKNOWN]).tolist():
+                records[field][word_ids == word_id] = self._word_id(other._word(word_id))
+        self._add_records(records)
+
+    def records(self, start = 0):
+        """
+        This method returns the stored records from game start onwards, read
+        from the spill file and the buffer
+
+        Parameters
+        ----------
+        start:      int
+                    index of the first game
+
+        Returns
+        -------
+        records:    np.ndarray
+                    structured array of RESULT_DTYPE
+        """
+        if start < self._offset:
+            if not self.spill_file:
+                raise IndexError(f"game {start} was not kept, pass a spill file to keep every game")
+            spilled = np.memmap(self.spill_file, dtype = RESULT_DTYPE, mode = 'r')[start:self._offset]
+            return np.concatenate([spilled, self._buffer[:self._n_buffered]])
+        return self._buffer[start - self._offset:self._n_buffered]
+
+    def game(self, idx):
+        """
+        This method returns a game as a dict with its guesses, evaluations,
+        number of guesses, answer and time to solve
+
+        Parameters
+        ----------
+        idx:        int
+                    index of the game, negative indices count from the last game
+
+        Returns
+        -------
+        game_data:  dict
+                    game data
+        """
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError("game index out of range")
+        record = self.records(idx)[0]
+        game_data = {}
+        game_data['won'] = bool(record['won'])
+        for i in range(record['num_guesses']):
+            game_data[f"guess_{i+1}"] = self._word(int(record['guesses'][i]))
+            game_data[f"eval_{i+1}"] = render_pattern(int(record['codes'][i]))
+        game_data['num_guesses'] = int(record['num_guesses'])
+        game_data['answer'] = self._word(int(record['answer']))
+        game_data['time_to_solve'] = round(float(record['time']), 2)
+        return game_data
+
+    def __getitem__(self, idx):
+        return self.game(idx)
+
+    def find(self, answer):
+        """This method returns the index of the last stored game with an answer, or None"""
+        word_id = self._word_id(answer, add = False)
+        if word_id is None:
+            return None
+        matches = np.flatnonzero(self.records(self._offset if not self.spill_file else 0)['answer'] == word_id)
+        if len(matches) == 0:
+            return None
+        return int(matches[-1]) + (0 if self.spill_file else self._offset)
+
+    def lost_on_words(self):
+        """This method returns the known answers of lost games, with how many times each was lost"""
+        return [(WORDBANK.words[i], int(self.lost_on[i])) for i in np.flatnonzero(self.lost_on)] + list(self.lost_on_extra.items())
+
+
+_ROW_CODES = {render_pattern(code) : code for code in range(N_PATTERNS)}
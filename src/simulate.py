@@ -1,24 +1,279 @@
 import sys
 import os
+import json
 import random
+import argparse
+from multiprocessing import Pool
 
 from console_bot import ConsoleWordleBot
 from game import Game
 from words import POSS_ANSWERS
+from feedback import load_matrix
+from memo import GUESS_MEMO
+from store import SolverStore
+from instrument import TurnRecorder, Profiler, add_hook, remove_hook
+from lookahead import DEPTH
 
-poss_answers = list(POSS_ANSWERS).copy()
+SHARD_SIZE = 32
 
-def simulate(n_simulations, first_words):
+_store = None
+
+
+def init_worker():
+    """
+    This method sets up a process that plays shards. The word lists and
+    the memory mapped feedback matrix are shared with the parent process,
+    only the connection to the solver store is opened per process
+    """
+    global _store
+    _store = SolverStore()
+    load_matrix()
+
+
+def build_books(first_words, settings = None):
+    """
+    This method builds the missing opening books of the first words in
+    the parent process, so the worker processes only load them instead
+    of each building the same books at once
+    """
+    for word in first_words:
+        ConsoleWordleBot(word, settings = settings).prepare_book()
+
+
+def play_shard(shard):
+    """
+    This method plays every game of a shard with a bot for each first word
+
+    Parameters
+    ----------
+    shard:      tuple
+                (first_words, answers, seed, record_turns, settings) where seed seeds the
+                shard's random stream, record_turns turns on per turn records and
+                settings are passed to the bots
+
+    Returns
+    -------
+    results:    dict
+                {'data', 'memo', 'store', 'turns', 'error'} where data holds each bot's game data,
+                memo and store hold the cache counters for the shard, turns holds the
+                turn records if they were asked for, and error is (answer, message)
+                if a game raised an exception
+    """
+    first_words, answers, seed, record_turns, settings = shard
+    random.seed(seed)
+    recorder = TurnRecorder()
+    if record_turns:
+        add_hook(recorder)
+    memo_before = GUESS_MEMO.stats()
+    store_before = _store.hits, _store.misses
+    bots = [ConsoleWordleBot(word, store = _store, settings = settings) for word in first_words]
+    error = None
+    for answer in answers:
+        game = Game(answer)
+        try:
+            for bot in bots:
+                bot.play_game(game)
+        except Exception as e:
+            error = (answer, str(e))
+            break
+    remove_hook(recorder)
+    memo_after = GUESS_MEMO.stats()
+    return {'data' : [bot.get_data() for bot in bots],
+            'memo' : {key : memo_after[key] - memo_before[key] for key in ['hits', 'misses', 'evictions']},
+            'store' : {'hits' : _store.hits - store_before[0], 'misses' : _store.misses - store_before[1]},
+            'turns' : recorder.records,
+            'error' : error}
+
+
+def evaluate_shard(shard):
+    """
+    This method plays one game for every (first word, answer) pair. A game
+    that raises an exception is recorded as a failure instead of stopping
+    the shard
+
+    Parameters
+    ----------
+    shard:      tuple
+                (pairs, settings) where pairs is a list of (first_word, answer) tuples
+                and settings are passed to the bots
+
+    Returns
+    -------
+    records:    list
+                list of {'first_word', 'answer', 'game', 'error'} dicts where game
+                is the bot's data for the game, or None if it failed
+    """
+    pairs, settings = shard
+    records = []
+    for first_word, answer in pairs:
+        random.seed(f"{first_word}:{answer}")
+        bot = ConsoleWordleBot(first_word, store = _store, settings = settings)
+        try:
+            bot.play_game(Game(answer))
+            records.append({'first_word' : first_word, 'answer' : answer, 'game' : bot.get_data()[-1], 'error' : None})
+        except Exception as e:
+            records.append({'first_word' : first_word, 'answer' : answer, 'game' : None, 'error' : f"{type(e).__name__}: {e}"})
+    return records
+
+
+def read_results(filename):
+    """
+    This method reads the records of an exhaustive run. A last line that
+    was cut off by a crash is dropped from the file so it can be appended to
+
+    Parameters
+    ----------
+    filename:   str
+                json lines file written by exhaustive
+
+    Returns
+    -------
+    records:    list
+                list of records in the order they were written
+    """
+    records = []
+    if not os.path.exists(filename):
+        return records
+    valid_size = 0
+    with open(filename, 'rb') as file:
+        for line in file:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                break
+            valid_size += len(line)
+    if valid_size != os.path.getsize(filename):
+        with open(filename, 'r+b') as file:
+            file.truncate(valid_size)
+    return records
+
+
+def exhaustive(first_words, filename = None, workers = 1, settings = None):
+    """
+    This method plays every first word against every possible answer.
+    Each game is appended to a json lines file as soon as its shard
+    finishes, so a run that crashes or is interrupted picks up where it
+    stopped when started again with the same file
+
+    Parameters
+    ----------
+    first_words:    list
+                    list of first guesses to use
+    filename:       str
+                    json lines file to write to, named after the first words if not given
+    workers:        int
+                    number of processes to play the games on
+    settings:       dict
+                    solver settings passed to the bots
+    """
+    if filename is None:
+        filename = f"exhaustive_{'_'.join(first_words)}.jsonl"
+    records = read_results(filename)
+    done = {(record['first_word'], record['answer']) for record in records}
+    pairs = [(word, answer) for answer in POSS_ANSWERS.words for word in first_words if (word, answer) not in done]
+    shards = [(pairs[i:i + SHARD_SIZE], settings) for i in range(0, len(pairs), SHARD_SIZE)]
+    n_games = len(POSS_ANSWERS) * len(first_words)
+    print(f"Evaluating '{', '.join(first_words)}' against all {len(POSS_ANSWERS)} answers, {len(done)} of {n_games} games already in {filename}\n")
+
+    build_books(first_words, settings)
+    init_worker()
+    if workers > 1:
+        pool = Pool(workers, initializer = init_worker)
+        results = pool.imap(evaluate_shard, shards)
+    else:
+        pool = None
+        results = map(evaluate_shard, shards)
+    try:
+        with open(filename, 'a', encoding = "utf-8") as outfile:
+            for shard_records in results:
+                for record in shard_records:
+                    outfile.write(json.dumps(record, ensure_ascii = False) + "\n")
+                outfile.flush()
+                os.fsync(outfile.fileno())
+                records.extend(shard_records)
+                print(f"\r{len(records)} / {n_games} games", end = "")
+    except KeyboardInterrupt:
+        print(f"\nStopped after {len(records)} of {n_games} games, run again with the same file to resume")
+        if pool:
+            pool.terminate()
+        return
+    if pool:
+        pool.close()
+        pool.join()
+
+    print("\n")
+    failures = [record for record in records if record['error']]
+    for word in first_words:
+        bot = ConsoleWordleBot(word, settings = settings)
+        for record in records:
+            if record['first_word'] == word and record['game']:
+                bot.data.add_game(record['game'])
+        if len(bot.data):
+            bot.display_data()
+    if failures:
+        print(f"{len(failures)} games failed:")
+        for record in failures:
+            print(f"{record['first_word']} {record['answer']}: {record['error']}")
+
+
+def make_shards(first_words, answers, seed, record_turns = False, settings = None):
+    """
+    This method splits the answers into fixed size shards. Each shard's seed
+    only depends on the run's seed and the shard's position, so results
+    do not depend on how many workers play them
+
+    Parameters
+    ----------
+    first_words:    list
+                    list of first guesses to use
+    answers:        list
+                    answers in the order they are played
+    seed:           int
+                    seed of the run
+    record_turns:   bool
+                    true to collect a record of every turn
+    settings:       dict
+                    solver settings passed to the bots
+
+    Returns
+    -------
+    shards:         list
+                    list of (first_words, answers, seed, record_turns, settings) tuples
+    """
+    shards = []
+    for i in range(0, len(answers), SHARD_SIZE):
+        shards.append((first_words, answers[i:i + SHARD_SIZE], f"{seed}:{i // SHARD_SIZE}", record_turns, settings))
+    return shards
+
+
+def simulate(n_simulations, first_words, workers = 1, seed = None, turn_log = None, profile_file = None, memory_file = None, settings = None, spill = None):
     """
     This method simulates <n_simulation> games using <first_words> as
     the first guess(es). It then displays the result of using each first word
-    
+
     Parameters
     ----------
     n_simulations:      int
                         number of games to play
     firt_words:         list
                         list of first guesses to use
+    workers:            int
+                        number of processes to play the games on
+    seed:               int
+                        seed used to pick the answers, random if not given
+    turn_log:           str
+                        json lines file to write a record of every turn to
+    profile_file:       str
+                        file to write a cProfile profile of the run to, with a
+                        readable summary next to it
+    memory_file:        str
+                        file to write the tracemalloc peak and top allocations to
+    settings:           dict
+                        solver settings passed to the bots, see utils.SOLVER_SETTINGS
+    spill:              str
+                        prefix of the files every game of each first word is written
+                        to, i.e. results gives results_slate.bin; without it only the
+                        totals and the most recent games are kept
     """
     def print_progress_bar(iteration, prefix = "Progress", suffix = 'Complete', decimals = 1, length = 80, fill ='█', end = "\r"):
         """This method prints a progress bar to the screen"""
@@ -28,36 +283,121 @@ def simulate(n_simulations, first_words):
         print(f'\r{prefix} |{bar}| {percent}% {suffix}', end = end)
 
 
+    if seed is None:
+        seed = random.randrange(2 ** 32)
     os.system('cls' if os.name == 'nt' else 'clear')
-    print(f"Simulating {n_simulations} games of wordle trying '{first_words[0]}, {', '.join(first_words[1:])}' as first guesses\n\n")
-    bots = []
-    for word in first_words:
-        bots.append(ConsoleWordleBot(word))
-    for i in range(n_simulations):
-        print_progress_bar(i)
-        answer = random.choice(poss_answers)
-        poss_answers.pop(poss_answers.index(answer))
-        game = Game(answer)
-        for bot in bots:
-            try:
-                bot.play_game(game)
-            except Exception as e:
+    print(f"Simulating {n_simulations} games of wordle trying '{first_words[0]}, {', '.join(first_words[1:])}' as first guesses with seed {seed} on {workers} worker(s)\n\n")
+    answers = random.Random(seed).sample(POSS_ANSWERS.words, n_simulations)
+    shards = make_shards(first_words, answers, seed, turn_log is not None, settings)
+    if workers > 1 and (profile_file or memory_file):
+        print("Profiling only covers the main process, running on 1 worker\n")
+        workers = 1
+    bots = [ConsoleWordleBot(word, settings = settings, spill_file = f"{spill}_{word}.bin" if spill else None) for word in first_words]
+    memo_stats = {'hits' : 0, 'misses' : 0, 'evictions' : 0}
+    store_stats = {'hits' : 0, 'misses' : 0}
+
+    build_books(first_words, settings)
+    init_worker()
+    if workers > 1:
+        pool = Pool(workers, initializer = init_worker)
+        results = pool.imap(play_shard, shards)
+    else:
+        pool = None
+        results = map(play_shard, shards)
+    turn_file = open(turn_log, 'w') if turn_log else None
+    recorder = TurnRecorder(keep = False)
+    # the profile is written even if the run stops on an error
+    with Profiler(profile_file, memory_file):
+        played = 0
+        print_progress_bar(played)
+        for shard, result in zip(shards, results):
+            for record in result['turns']:
+                recorder(record)
+            if turn_file:
+                for record in result['turns']:
+                    turn_file.write(json.dumps(record) + "\n")
+            for bot, data in zip(bots, result['data']):
+                bot.data.extend(data)
+            for key in memo_stats:
+                memo_stats[key] += result['memo'][key]
+            for key in store_stats:
+                store_stats[key] += result['store'][key]
+            if result['error']:
+                answer, message = result['error']
                 print(f'\rERROR ON WORD {answer}')
-                print(f'{e}')
+                print(f'{message}')
+                if pool:
+                    pool.terminate()
                 exit()
+            played += len(shard[1])
+            print_progress_bar(played)
+    if spill:
+        for bot in bots:
+            bot.data.flush()
+    if turn_file:
+        turn_file.close()
+    if pool:
+        pool.close()
+        pool.join()
+
     os.system('cls' if os.name == 'nt' else 'clear')
     for bot in bots:
         bot.display_data()
+    print(f"Guess memo: {memo_stats['hits']} hits, {memo_stats['misses']} misses, {memo_stats['evictions']} evictions")
+    print(f"Solver store: {store_stats['hits']} hits, {store_stats['misses']} misses, {_store.stats()['size']} states\n")
+    if turn_log:
+        summary = recorder.summary()
+        print(f"Turns: {summary['turns']}, guesses scored: {summary['guesses_scored']}, guesses pruned: {summary['guesses_pruned']}, cache hits: {summary['cache_hits']}")
+        print(f"Filtering: {round(summary['filter_time'], 2)} seconds, scoring: {round(summary['score_time'], 2)} seconds, records in {turn_log}")
+        print(f"Lookahead: {summary['lookahead_states']} states solved in {round(summary['lookahead_time'], 2)} seconds\n")
+    if profile_file:
+        print(f"Profile written to {profile_file} with a summary in {profile_file}.txt")
+    if memory_file:
+        print(f"Memory allocations written to {memory_file}")
+
+
+def solver_settings(args):
+    """This method returns the solver settings chosen on the command line"""
+    settings = {'prune' : args.prune,
+                'corpus' : 'wordbank' if args.normal else 'candidates'}
+    if args.lookahead:
+        settings.update({'strategy' : 'lookahead', 'top_k' : args.lookahead, 'depth' : args.depth})
+    return settings
 
 
 def main():
-    if len(sys.argv) == 1:
+    if len(sys.argv) > 1 and sys.argv[1] == "exhaustive":
+        parser = argparse.ArgumentParser(prog = "simulate.py exhaustive", description = "Play every first word against every possible answer")
+        parser.add_argument("first_words", nargs = "+")
+        parser.add_argument("--out", default = None, help = "json lines file to write to and resume from")
+        parser.add_argument("--workers", type = int, default = 1, help = "number of processes to play on")
+        parser.add_argument("--prune", action = "store_true", help = "skip guesses that cannot beat the best one found")
+        parser.add_argument("--normal", action = "store_true", help = "play normal mode, guessing from the whole word bank")
+        parser.add_argument("--lookahead", type = int, default = 0, metavar = "K", help = "re-rank the top K guesses by looking moves ahead")
+        parser.add_argument("--depth", type = int, default = DEPTH, help = "number of moves the lookahead looks at")
+        args = parser.parse_args(sys.argv[2:])
+        exhaustive(args.first_words, args.out, args.workers, solver_settings(args))
+    elif len(sys.argv) == 1:
         n_simulations = int(input("Enter number of simulations:\n"))
         first_words = input("Enter first words to try separated by whitespace:\n").split()
         simulate(n_simulations, first_words)
     else:
-        simulate(int(sys.argv[1]), sys.argv[2:])
+        parser = argparse.ArgumentParser(description = "Simulate games of wordle")
+        parser.add_argument("n_simulations", type = int)
+        parser.add_argument("first_words", nargs = "+")
+        parser.add_argument("--workers", type = int, default = 1, help = "number of processes to play on")
+        parser.add_argument("--seed", type = int, default = None, help = "seed used to pick the answers")
+        parser.add_argument("--turn-log", default = None, help = "json lines file to write a record of every turn to")
+        parser.add_argument("--profile", default = None, help = "file to write a cProfile profile to")
+        parser.add_argument("--tracemalloc", default = None, help = "file to write the top memory allocations to")
+        parser.add_argument("--spill", default = None, help = "prefix of the files to write every game to, so display_game can read them back")
+        parser.add_argument("--prune", action = "store_true", help = "skip guesses that cannot beat the best one found")
+        parser.add_argument("--normal", action = "store_true", help = "play normal mode, guessing from the whole word bank")
+        parser.add_argument("--lookahead", type = int, default = 0, metavar = "K", help = "re-rank the top K guesses by looking moves ahead")
+        parser.add_argument("--depth", type = int, default = DEPTH, help = "number of moves the lookahead looks at")
+        args = parser.parse_args()
+        simulate(args.n_simulations, args.first_words, args.workers, args.seed, args.turn_log, args.profile, args.tracemalloc, solver_settings(args), args.spill)
 
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,377 @@
+import os
+import json
+import asyncio
+import argparse
+import numpy as np
+from time import perf_counter
+from collections import deque
+from urllib.parse import urlsplit
+from concurrent.futures import ProcessPoolExecutor
+
+from words import WORDBANK, PREV_ANSWERS, is_word
+from feedback import EVALUATIONS, ALL_CORRECT, N_PATTERNS, MAX_GUESSES, encode_pattern, load_matrix
+from candidates import all_candidates, filter_candidates, candidate_words
+from utils import SOLVER_SETTINGS, guess_corpus, rank_candidates
+from memo import GuessMemo, state_key
+
+HOST = "127.0.0.1"
+PORT = 8422
+TOP = 10
+MAX_TOP = 50
+WINDOW = 10000
+MAX_BODY = 1 << 16
+RECENT_SECONDS = 60
+SETTING_VALUES = {'strategy' : ('entropy', 'lookahead'),
+                    'corpus' : ('candidates', 'wordbank'),
+                    'prune' : (False, True)}
+STATUS_TEXT = {200 : "OK", 400 : "Bad Request", 404 : "Not Found", 405 : "Method Not Allowed", 500 : "Internal Server Error"}
+
+
+class RequestError(Exception):
+    """This class is raised for a request the service cannot answer, with the HTTP status to reply with"""
+    def __init__(self, message, status = 400):
+        super().__init__(message)
+        self.status = status
+
+
+def init_worker():
+    """This method loads the feedback matrix once in every worker process"""
+    load_matrix()
+
+
+def rank_state(candidates, prev_guesses, prev_answers, settings, n_ranked):
+    """
+    This method ranks the guesses for a candidate set in a worker process
+
+    Parameters
+    ----------
+    candidates:     np.ndarray
+                    sorted word bank indices of the possible words
+    prev_guesses:   list
+                    list of previous guesses
+    prev_answers:   list
+                    list of previous answers
+    settings:       dict
+                    solver settings
+    n_ranked:       int
+                    number of the best guesses to return
+
+    Returns
+    -------
+    ranked:         tuple
+                    (word bank indices, scores) of the best guesses
+    """
+    ranked_idx, ranked_scores = rank_candidates(candidates, prev_guesses, prev_answers, settings = settings)
+    return np.asarray(ranked_idx[:n_ranked]), np.asarray(ranked_scores[:n_ranked])
+
+
+def parse_pattern(pattern):
+    """
+    This method reads the pattern of a guess in a request, given as its
+    pattern code, as a list of evaluations or as a string of five digits
+    where 0 is absent, 1 present and 2 correct
+
+    Parameters
+    ----------
+    pattern:    object
+                pattern from the request
+
+    Returns
+    -------
+    code:       int
+                pattern code, see feedback.encode_pattern
+    """
+    if isinstance(pattern, int) and not isinstance(pattern, bool) and 0 <= pattern < N_PATTERNS:
+        return pattern
+    if isinstance(pattern, str) and len(pattern) == 5 and set(pattern) <= set("012"):
+        return encode_pattern(EVALUATIONS[int(digit)] for digit in pattern)
+    if isinstance(pattern, list) and len(pattern) == 5 and all(evaluation in EVALUATIONS for evaluation in pattern):
+        return encode_pattern(pattern)
+    raise RequestError(f"{pattern!r} is not a pattern")
+
+
+def parse_settings(settings):
+    """This method merges the settings of a request into utils.SOLVER_SETTINGS, checking every value"""
+    if not isinstance(settings, dict):
+        raise RequestError("settings must be an object")
+    for key, value in settings.items():
+        # 1 == True, so the type is checked too, otherwise it would give another memo key than true
+        if key in SETTING_VALUES and not any(type(value) is type(allowed) and value == allowed for allowed in SETTING_VALUES[key]):
+            raise RequestError(f"{key} must be one of {', '.join(map(str, SETTING_VALUES[key]))}")
+        if key in ('top_k', 'depth') and not (type(value) is int and value > 0):
+            raise RequestError(f"{key} must be a positive integer")
+        if key not in SETTING_VALUES and key not in ('top_k', 'depth'):
+            raise RequestError(f"unknown setting {key}")
+    return {**SOLVER_SETTINGS, **settings}
+
+
+def parse_history(body):
+    """
+    This method replays the history of a request
+
+    Parameters
+    ----------
+    body:           dict
+                    request with 'history', a list of [guess, pattern], and
+                    optionally 'exclude_prev_answers'
+
+    Returns
+    -------
+    candidates:     np.ndarray
+                    sorted word bank indices of the words that match the history
+    prev_guesses:   list
+                    list of the guesses in the history
+    prev_answers:   list
+                    previous answers that are neither guessed nor candidates
+    solved:         bool
+                    true if the last guess was all correct
+    """
+    history = body.get('history', [])
+    if not isinstance(history, list) or len(history) > MAX_GUESSES:
+        raise RequestError(f"history must be a list of at most {MAX_GUESSES} [guess, pattern] pairs")
+    prev_answers = PREV_ANSWERS if body.get('exclude_prev_answers') else []
+    candidates = all_candidates(exclude = prev_answers)
+    prev_guesses = []
+    for turn in history:
+        # guesses outside the word bank are filtered on directly, see candidates.filter_candidates
+        if not isinstance(turn, list) or len(turn) != 2 or not is_word(turn[0]):
+            raise RequestError(f"{turn!r} is not a [guess, pattern] pair of a five letter word")
+        guess, code = turn[0], parse_pattern(turn[1])
+        prev_guesses.append(guess)
+        if code == ALL_CORRECT:
+            if guess not in WORDBANK.index:
+                raise RequestError("no word matches the history")
+            return np.array([WORDBANK.index[guess]]), prev_guesses, prev_answers, True
+        candidates = filter_candidates(guess, code, candidates)
+    if len(candidates) == 0:
+        raise RequestError("no word matches the history")
+    return candidates, prev_guesses, prev_answers, False
+
+
+class SolverService:
+    """
+    This class is a long lived HTTP/JSON service around the solver. The
+    word lists, the feedback matrix and a memo of ranked states stay in
+    memory between requests. POST /guess takes a history of guesses and
+    their patterns and returns the next guess with ranked alternatives,
+    POST /candidates returns the words that match a history, and GET
+    /metrics returns latency percentiles and throughput. Requests are
+    read and answered on an asyncio event loop and scoring is done in a
+    process pool, so a slow ranking never holds up requests that are
+    already in the memo. Concurrent requests for the same candidate set,
+    corpus and settings share a single ranking
+    """
+    def __init__(self, workers = None, memo_size = 1 << 16):
+        self.workers = workers or os.cpu_count()
+        self.memo = GuessMemo(memo_size)
+        self.pool = None
+        self.in_flight = {}
+        self.started = perf_counter()
+        self.window = deque(maxlen = WINDOW)
+        self.counters = {'requests' : 0,
+                            'errors' : 0,
+                            'memo_hits' : 0,
+                            'batched' : 0,
+                            'rankings' : 0}
+
+    def start(self):
+        """This method warms the in memory state and starts the worker pool"""
+        load_matrix()
+        self.pool = ProcessPoolExecutor(self.workers, initializer = init_worker)
+
+    def close(self):
+        """This method stops the worker pool"""
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures = True)
+            self.pool = None
+
+    async def rank(self, candidates, prev_guesses, prev_answers, settings):
+        """
+        This method returns the best guesses for a state, from the memo,
+        from a ranking of the same state that is already running, or from
+        a new ranking in the worker pool
+
+        Returns
+        -------
+        ranked:     tuple
+                    (word bank indices, scores) of up to MAX_TOP guesses
+        source:     str
+                    'memo', 'batched' or 'ranked'
+        """
+        guess_idx, _ = guess_corpus(candidates, prev_guesses, prev_answers, settings)
+        if len(guess_idx) == 0:
+            raise RequestError("every word that matches the history was already guessed")
+        key = state_key(candidates, guess_idx, settings)
+        ranked = self.memo.get(key)
+        if ranked is not None:
+            self.counters['memo_hits'] += 1
+            return ranked, 'memo'
+        if key in self.in_flight:
+            self.counters['batched'] += 1
+            return await asyncio.shield(self.in_flight[key]), 'batched'
+        future = asyncio.get_running_loop().run_in_executor(self.pool, rank_state, candidates, list(prev_guesses), list(prev_answers), settings, MAX_TOP)
+        self.in_flight[key] = future
+        self.counters['rankings'] += 1
+        try:
+            ranked = await future
+        finally:
+            del self.in_flight[key]
+        self.memo.put(key, ranked)
+        return ranked, 'ranked'
+
+    async def next_guess(self, body):
+        """This method answers POST /guess"""
+        top = body.get('top', TOP)
+        if not isinstance(top, int) or not 0 < top <= MAX_TOP:
+            raise RequestError(f"top must be between 1 and {MAX_TOP}")
+        settings = parse_settings(body.get('settings', {}))
+        candidates, prev_guesses, prev_answers, solved = parse_history(body)
+        if solved:
+            return {'guess' : prev_guesses[-1], 'solved' : True, 'candidates' : 1, 'alternatives' : [], 'source' : None}
+        if len(candidates) == 1:
+            return {'guess' : WORDBANK.words[candidates[0]], 'solved' : False, 'candidates' : 1, 'alternatives' : [], 'source' : None}
+        (ranked_idx, ranked_scores), source = await self.rank(candidates, prev_guesses, prev_answers, settings)
+        return {'guess' : WORDBANK.words[ranked_idx[0]],
+                'solved' : False,
+                'candidates' : len(candidates),
+                'alternatives' : [{'word' : WORDBANK.words[i], 'score' : float(score)} for i, score in zip(ranked_idx[:top], ranked_scores[:top])],
+                'source' : source}
+
+    async def matching_words(self, body):
+        """This method answers POST /candidates"""
+        candidates, _, _, _ = parse_history(body)
+        return {'count' : len(candidates), 'words' : candidate_words(candidates)}
+
+    def metrics(self):
+        """
+        This method returns the service's counters, its throughput since it
+        started and over the last RECENT_SECONDS, and the latency percentiles,
+        in milliseconds, of the last WINDOW requests
+        """
+        now = perf_counter()
+        uptime = now - self.started
+        metrics = {**self.counters,
+                    'in_flight' : len(self.in_flight),
+                    'memo' : self.memo.stats(),
+                    'uptime' : uptime,
+                    'throughput' : self.counters['requests'] / uptime if uptime else 0.0}
+        recent = [latency for finished, latency in self.window if finished >= now - RECENT_SECONDS]
+        metrics['recent_throughput'] = len(recent) / min(RECENT_SECONDS, uptime) if uptime else 0.0
+        if self.window:
+            latencies = np.array([latency for _, latency in self.window]) * 1000
+            for name, value in zip(['p50', 'p90', 'p99'], np.percentile(latencies, [50, 90, 99])):
+                metrics[f'latency_{name}_ms'] = float(value)
+            metrics['latency_max_ms'] = float(latencies.max())
+        return metrics
+
+    async def route(self, method, path, body):
+        """
+        This method answers a request
+
+        Returns
+        -------
+        status:     int
+                    HTTP status
+        response:   dict
+                    json body of the response
+        """
+        routes = {'/guess' : ('POST', self.next_guess),
+                    '/candidates' : ('POST', self.matching_words),
+                    '/metrics' : ('GET', None)}
+        if path not in routes:
+            return 404, {'error' : f"no route {path}"}
+        if method != routes[path][0]:
+            return 405, {'error' : f"{path} only accepts {routes[path][0]}"}
+        if path == '/metrics':
+            return 200, self.metrics()
+        try:
+            request = json.loads(body or b"{}")
+        except ValueError:
+            return 400, {'error' : "body is not json"}
+        if not isinstance(request, dict):
+            return 400, {'error' : "body is not a json object"}
+        try:
+            return 200, await routes[path][1](request)
+        except RequestError as error:
+            return error.status, {'error' : str(error)}
+
+    async def handle(self, reader, writer):
+        """This method serves the requests of a connection, which is kept open until the client closes it"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                start = perf_counter()
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode('latin-1').partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                path = urlsplit(target).path
+                keep_alive = version == "HTTP/1.1" and headers.get('connection', '').lower() != "close"
+                try:
+                    length = int(headers.get('content-length', 0))
+                    if not 0 <= length <= MAX_BODY:
+                        raise ValueError
+                except ValueError:
+                    # where the body ends is not known, so the connection is closed after replying
+                    status, response = 400, {'error' : f"Content-Length must be between 0 and {MAX_BODY}"}
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(length)
+                    try:
+                        status, response = await self.route(method, path, body)
+                    except Exception as error:
+                        status, response = 500, {'error' : repr(error)}
+                data = json.dumps(response).encode()
+                writer.write(f"HTTP/1.1 {status} {STATUS_TEXT[status]}\r\n"
+                                f"Content-Type: application/json\r\n"
+                                f"Content-Length: {len(data)}\r\n"
+                                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + data)
+                await writer.drain()
+                if path != '/metrics':
+                    self.counters['requests'] += 1
+                    self.counters['errors'] += status >= 400
+                    self.window.append((perf_counter(), perf_counter() - start))
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(host = HOST, port = PORT, workers = None):
+    """This method runs a SolverService until it is cancelled"""
+    service = SolverService(workers)
+    service.start()
+    server = await asyncio.start_server(service.handle, host, port)
+    print(f"Solver service on http://{host}:{port} with {service.workers} workers")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description = "Serve the solver over HTTP/JSON")
+    parser.add_argument("--host", default = HOST)
+    parser.add_argument("--port", type = int, default = PORT)
+    parser.add_argument("--workers", type = int, default = None, help = "number of processes to rank guesses on, one per CPU if not given")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import numpy as np
+
+from feedback import CACHE_DIR, wordbank_hash
+from utils import SOLVER_SETTINGS
+
+STORE_FILE = os.path.join(CACHE_DIR, "solver_states.sqlite")
+
+
+def store_version(settings):
+    """
+    This method returns the version solved states are stored under. It
+    changes whenever the word bank or the solver settings change
+
+    Parameters
+    ----------
+    settings:   dict
+                solver settings
+
+    Returns
+    -------
+    version:    str
+                short hash of the word bank and settings
+    """
+    settings_str = json.dumps(settings, sort_keys = True)
+    return hashlib.sha1(f"{wordbank_hash()}|{settings_str}".encode()).hexdigest()[:16]
+
+
+class SolverStore:
+    """
+    This class is a persistent store of solved states, shared between runs
+    and between processes. It maps a state key from memo.state_key to the
+    best ranked guesses and their scores, and can be used anywhere a
+    GuessMemo is used. SQLite handles locking, so several worker processes
+    can read and write the same file at once
+    """
+    def __init__(self, filename = STORE_FILE, settings = None, keep = 64):
+        self.filename = filename
+        self.version = store_version(settings if settings is not None else SOLVER_SETTINGS)
+        self.keep = keep
+        self.hits = 0
+        self.misses = 0
+        self._conn = None
+        self._pid = None
+
+    def _connect(self):
+        """This method returns this process's connection, opening it on first use"""
+        if self._conn is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(self.filename) or ".", exist_ok = True)
+            self._conn = sqlite3.connect(self.filename, timeout = 60)
+            self._pid = os.getpid()
+            self._conn.execute("PRAGMA journal_mode = WAL")
+            self._conn.execute("PRAGMA synchronous = NORMAL")
+            self._conn.execute("""CREATE TABLE IF NOT EXISTS states (
+                                    key TEXT NOT NULL,
+                                    version TEXT NOT NULL,
+                                    ranked BLOB NOT NULL,
+                                    scores BLOB NOT NULL,
+                                    created REAL NOT NULL,
+                                    PRIMARY KEY (key, version))""")
+            self._conn.commit()
+        return self._conn
+
+    def get(self, key):
+        """
+        This method returns the ranked guesses stored for a key, or None
+
+        Parameters
+        ----------
+        key:            str
+                        key from memo.state_key
+
+        Returns
+        -------
+        ranked:         tuple
+                        (ranked_idx, ranked_scores) arrays
+        """
+        row = self._connect().execute("SELECT ranked, scores FROM states WHERE key = ? AND version = ?",
+                                        (key, self.version)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return np.frombuffer(row[0], dtype = np.int32).astype(np.intp), np.frombuffer(row[1], dtype = np.float64)
+
+    def put(self, key, ranked):
+        """
+        This method stores the best ranked guesses of a state
+
+        Parameters
+        ----------
+        key:            str
+                        key from memo.state_key
+        ranked:         tuple
+                        (ranked_idx, ranked_scores) arrays
+        """
+        ranked_idx, ranked_scores = ranked
+        conn = self._connect()
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO states VALUES (?, ?, ?, ?, ?)",
+                            (key, self.version,
+                            np.asarray(ranked_idx[:self.keep], dtype = np.int32).tobytes(),
+                            np.asarray(ranked_scores[:self.keep], dtype = np.float64).tobytes(),
+                            time.time()))
+
+    def compact(self):
+        """
+        This method deletes states stored under any other version
+        and shrinks the file
+
+        Returns
+        -------
+        removed:    int
+                    number of states removed
+        """
+        conn = self._connect()
+        with conn:
+            removed = conn.execute("DELETE FROM states WHERE version != ?", (self.version,)).rowcount
+        conn.execute("VACUUM")
+        return removed
+
+    def stats(self):
+        """This method returns the store's counters"""
+        size = self._connect().execute("SELECT COUNT(*) FROM states WHERE version = ?", (self.version,)).fetchone()[0]
+        return {'size' : size,
+                'hits' : self.hits,
+                'misses' : self.misses}
+
+    def close(self):
+        """This method closes this process's connection"""
+        if self._conn is not None and self._pid == os.getpid():
+            self._conn.close()
+        self._conn = None
+
+
+if __name__ == '__main__':
+    store = SolverStore()
+    print(f"Removed {store.compact()} stale states from {store.filename}")
+    print(store.stats())
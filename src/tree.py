@@ -0,0 +1,266 @@
+import os
+import sys
+import json
+import numpy as np
+from datetime import datetime
+
+from console_bot import ConsoleWordleBot
+from game import Game
+from words import WORDBANK, POSS_ANSWERS, write_atomic
+from feedback import CACHE_DIR, ALL_CORRECT, MAX_GUESSES, load_matrix, wordbank_hash
+from candidates import all_candidates
+from utils import SOLVER_SETTINGS, rank_candidates
+from memo import GuessMemo, state_key
+
+
+def build_tree(first_guess, answers = POSS_ANSWERS, memo = None):
+    """
+    This method builds the full strategy of the bot for a first guess
+    Starting from the first guess, every feedback pattern that some answer
+    can give splits the candidates, and the bot's next guess for each part
+    is found the same way ConsoleWordleBot finds it. Candidate sets that
+    are reached in more than one way share a single node
+
+    Parameters
+    ----------
+    first_guess:    str
+                    first guess, which must be in the word bank
+    answers:        iterable
+                    answers the tree has to cover
+    memo:           GuessMemo
+                    cache of guess decisions, a new one is used if not given
+
+    Returns
+    -------
+    tree:           dict
+                    {'first_guess', 'wordbank', 'settings', 'nodes'} where nodes[0] is
+                    the root and each node is [guess index, {pattern code : node index}]
+    """
+    if first_guess not in WORDBANK.index:
+        raise ValueError(f"{first_guess} is not in the word bank")
+    if memo is None:
+        memo = GuessMemo(maxsize = 1 << 20, keep = 1)
+    matrix = load_matrix()
+    is_answer = np.zeros(len(WORDBANK), dtype = bool)
+    is_answer[[WORDBANK.index[answer] for answer in answers]] = True
+    nodes = []
+    node_ids = {}
+
+    def add_node(guess_idx, candidates, depth):
+        """This method adds the node for a guess and returns its index"""
+        key = (state_key(candidates, [guess_idx], SOLVER_SETTINGS), depth)
+        if key in node_ids:
+            return node_ids[key]
+        node_id = len(nodes)
+        node_ids[key] = node_id
+        children = {}
+        nodes.append([int(guess_idx), children])
+        if depth == MAX_GUESSES:
+            return node_id
+        codes = matrix[guess_idx][candidates]
+        for code in np.unique(codes[is_answer[candidates]]).tolist():
+            if code == ALL_CORRECT:
+                continue
+            sub_candidates = candidates[codes == code]
+            ranked_idx, _ = rank_candidates(sub_candidates, [], [], memo)
+            children[code] = add_node(ranked_idx[0], sub_candidates, depth + 1)
+        return node_id
+
+    add_node(WORDBANK.index[first_guess], all_candidates(), 1)
+    return {'first_guess' : first_guess,
+            'wordbank' : wordbank_hash(),
+            'settings' : SOLVER_SETTINGS,
+            'nodes' : nodes}
+
+
+def walk_tree(tree, answer):
+    """
+    This method plays the tree against an answer
+
+    Parameters
+    ----------
+    tree:       dict
+                tree from build_tree
+    answer:     str
+                correct answer
+
+    Returns
+    -------
+    guesses:    list
+                list of guesses the bot makes
+    won:        bool
+                true if the last guess is the answer
+    """
+    matrix = load_matrix()
+    nodes = tree['nodes']
+    node = nodes[0]
+    guesses = []
+    while True:
+        guesses.append(WORDBANK.words[node[0]])
+        code = int(matrix[node[0], WORDBANK.index[answer]])
+        if code == ALL_CORRECT:
+            return guesses, True
+        if code not in node[1]:
+            return guesses, False
+        node = nodes[node[1][code]]
+
+
+def tree_stats(tree, answers = POSS_ANSWERS):
+    """
+    This method computes the exact results of a tree over every answer
+
+    Parameters
+    ----------
+    tree:       dict
+                tree from build_tree
+    answers:    iterable
+                answers to play against
+
+    Returns
+    -------
+    stats:      dict
+                {'games', 'win_rate', 'avg_guesses', 'distribution', 'lost_on'}
+                where avg_guesses is over the games that were won
+    """
+    distribution = {}
+    lost_on = []
+    for answer in sorted(answers):
+        guesses, won = walk_tree(tree, answer)
+        if won:
+            distribution[len(guesses)] = distribution.get(len(guesses), 0) + 1
+        else:
+            lost_on.append(answer)
+    wins = sum(distribution.values())
+    total_guesses = sum(n_guesses * amount for n_guesses, amount in distribution.items())
+    return {'games' : wins + len(lost_on),
+            'win_rate' : wins / (wins + len(lost_on)) * 100,
+            'avg_guesses' : total_guesses / wins if wins else 0,
+            'distribution' : dict(sorted(distribution.items())),
+            'lost_on' : lost_on}
+
+
+def tree_filename(first_guess, directory = CACHE_DIR):
+    """This method returns where the tree of a first guess is saved"""
+    return os.path.join(directory, f"tree_{first_guess}.json")
+
+
+def save_tree(tree, filename = None):
+    """
+    This method writes a tree to a json file. Nodes are stored once
+    as [guess, {code : child}] lists, so shared subtrees stay shared
+
+    Parameters
+    ----------
+    tree:       dict
+                tree from build_tree
+    filename:   str
+                file to write, tree_filename(first_guess) if not given
+    """
+    if filename is None:
+        filename = tree_filename(tree['first_guess'])
+    os.makedirs(os.path.dirname(filename) or ".", exist_ok = True)
+    nodes = [[WORDBANK.words[guess_idx], children] for guess_idx, children in tree['nodes']]
+    json_string = json.dumps({**tree, 'nodes' : nodes}, separators = (',', ':'))
+    write_atomic(filename, json_string)
+
+
+def load_tree(filename):
+    """
+    This method reads a tree written by save_tree
+
+    Parameters
+    ----------
+    filename:   str
+                file to read
+
+    Returns
+    -------
+    tree:       dict
+                tree in the same form build_tree returns
+    """
+    with open(filename) as file:
+        tree = json.load(file)
+    if tree['wordbank'] != wordbank_hash() or tree['settings'] != SOLVER_SETTINGS:
+        raise ValueError(f"{filename} was built for a different word bank or solver settings")
+    tree['nodes'] = [[WORDBANK.index[guess], {int(code) : child for code, child in children.items()}]
+                        for guess, children in tree['nodes']]
+    return tree
+
+
+class TreeWordleBot(ConsoleWordleBot):
+    """
+    This class represents a command line bot that plays
+    by walking a prebuilt decision tree, so every guess
+    is a single lookup
+    """
+    def __init__(self, tree, verbose = False):
+        super().__init__(tree['first_guess'], verbose = verbose)
+        self.tree = tree
+
+    def play_game(self, game = None):
+        """
+        This method plays a game of Wordle by following the tree.
+        It returns when it either solves the puzzle or runs out of
+        guesses
+
+        Parameters
+        ----------
+        game:       Game()
+                    game to play on, otherwise create new one
+
+        Returns
+        -------
+        game:       Game()
+                    game that was played
+        """
+        if not game:
+            game = Game()
+        nodes = self.tree['nodes']
+        node = nodes[0]
+        prev_guesses = []
+        prev_guess_results = []
+        won = False
+        start = datetime.now()
+        while len(prev_guesses) < MAX_GUESSES:
+            guess = WORDBANK.words[node[0]]
+            code = game.check_guess(guess)
+            prev_guesses.append(guess)
+            prev_guess_results.append(code)
+            if code == ALL_CORRECT:
+                won = True
+                break
+            if code not in node[1]:
+                break
+            node = nodes[node[1][code]]
+
+        elapsed = (datetime.now() - start).total_seconds()
+        self._update_data(prev_guesses, prev_guess_results, won, game, elapsed)
+        if self.verbose:
+            self.display_game(idx = -1)
+        return game
+
+
+def main():
+    if len(sys.argv) == 1:
+        first_words = input("Enter first words to build trees for separated by whitespace:\n").split()
+    else:
+        first_words = sys.argv[1:]
+    for first_guess in first_words:
+        start = datetime.now()
+        tree = build_tree(first_guess)
+        save_tree(tree)
+        elapsed = (datetime.now() - start).total_seconds()
+        stats = tree_stats(tree)
+        print(f'Tree for "{first_guess.upper()}" with {len(tree["nodes"])} nodes built in {round(elapsed, 2)} seconds, saved to {tree_filename(first_guess)}\n')
+        print(f"Win rate: {stats['win_rate']}%\nAvg Guesses: {stats['avg_guesses']}\n")
+        for n_guesses in range(1, 7):
+            print(f"{n_guesses}  | {stats['distribution'].get(n_guesses, 0)}")
+        if stats['lost_on']:
+            print("\nLost on words:")
+            for word in stats['lost_on']:
+                print(word)
+        print('\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,18 @@
-from words import PREV_ANSWERS, WORDBANK
+from words import WORDBANK, PREV_ANSWERS, words_to_letters
+from feedback import ALL_CORRECT, encode_pattern, decode_pattern, word_indices, batch_check_guess
+from entropy import partition_counts, get_entropy, score_guesses, rank_scores, rank_guesses_anytime, rank_guesses_pruned
+from candidates import all_candidates, exclude_words, filter_candidates, candidate_words, candidate_mask
+from constraints import Constraints
+from memo import state_key
+from lookahead import TOP_K, DEPTH, rank_guesses_lookahead
 from datetime import datetime
 from datetime import timedelta
+from time import perf_counter
 import numpy as np
 
-color_dict = {'present' : "🟨",
-                'correct' : "🟩",
-                'absent' : "🏴󠁵󠁳󠁴󠁸󠁿"}
+SOLVER_SETTINGS = {'strategy' : 'entropy',
+                    'corpus' : 'candidates',
+                    'prune' : False}
 
 
 def time_until_end_of_today():
@@ -14,7 +21,7 @@ def time_until_end_of_today():
     return time_delta
 
 
-def new_guess(corpus, poss_words, prev_guesses, prev_answers = PREV_ANSWERS):
+def new_guess(corpus, poss_words, prev_guesses, prev_answers = PREV_ANSWERS, prune = False, stats = None):
     """
     This method is the brains behind finding what the next guess should be
     It looks through every possible word, and creates all possible outcomes of 
@@ -34,27 +41,230 @@ def new_guess(corpus, poss_words, prev_guesses, prev_answers = PREV_ANSWERS):
                             list of previous guesses
     prev_answers:           list 
                             list of previous answers
+    prune:                  bool
+                            true to skip guesses that cannot beat the best one found,
+                            which gives the same word with less work
+    stats:                  dict
+                            filled with the number of guesses scored and pruned, if given
 
     Returns
     -------
-    sorted_entropy[0][0]:   str
+    ranked[0][0]:           str
                             word with highest entropy
     """
-    word_entropy = {}
-    for word in corpus:
-        if word not in prev_guesses and word not in prev_answers:
-            poss_answers = {}
-            for poss_answer in poss_words:
-                result = check_guess(word, poss_answer)
-                result_str = "".join(result)
-                if result_str in poss_answers:
-                    poss_answers[result_str].append(word)
-                else:
-                    poss_answers[result_str] = [word]
-            entropy = get_entropy(poss_answers, poss_words)
-            word_entropy[word] = entropy 
-    sorted_entropy = sorted(list(word_entropy.items()), key = lambda x: x[1])[::-1]
-    return sorted_entropy[0][0]
+    return rank_words(corpus, poss_words, prev_guesses, prev_answers, prune, stats)[0][0]
+
+
+def rank_words(corpus, poss_words, prev_guesses, prev_answers = PREV_ANSWERS, prune = False, stats = None):
+    """
+    This method scores every word in the corpus against the possible words
+    and ranks them by entropy. The pattern codes of each block of guesses
+    are counted with a single bincount, see entropy.py. When pruning, only
+    the guesses that could be the best are scored and ranked
+
+    Parameters
+    ----------
+    corpus:                 list
+                            list of words to look over
+    poss_words:             list
+                            list of possible words
+    prev_guesses:           list
+                            list of previous guesses
+    prev_answers:           list 
+                            list of previous answers
+    prune:                  bool
+                            true to skip guesses that cannot beat the best one found
+    stats:                  dict
+                            filled with the number of guesses scored and pruned, if given
+
+    Returns
+    -------
+    ranked:                 list
+                            list of (word, entropy) from highest entropy to lowest
+    """
+    guesses = [word for word in corpus if word not in prev_guesses and word not in prev_answers]
+    poss_words = list(poss_words)
+    word_index = WORDBANK.index
+    if prune and all(word in word_index for word in guesses + poss_words):
+        ranked_idx, ranked_scores, prune_stats = rank_guesses_pruned(word_indices(guesses), word_indices(poss_words))
+        if stats is not None:
+            stats.update(prune_stats)
+        return [(WORDBANK.words[i], float(score)) for i, score in zip(ranked_idx, ranked_scores)]
+    if stats is not None:
+        stats.update({'scored' : len(guesses), 'pruned' : 0})
+    if all(word in word_index for word in guesses + poss_words):
+        scores = score_guesses(word_indices(guesses), word_indices(poss_words))
+    else:
+        codes = batch_check_guess(words_to_letters(guesses), words_to_letters(poss_words))
+        scores = get_entropy(partition_counts(codes))
+    return [(guesses[i], float(scores[i])) for i in rank_scores(scores)]
+
+
+def best_guess(candidates, prev_guesses, prev_answers = PREV_ANSWERS, memo = None, store = None, info = None, time_budget = None, settings = SOLVER_SETTINGS):
+    """
+    This method is new_guess for a candidate set of word bank indices
+    By default every remaining candidate is scored against the candidate
+    set, so the bot plays hard mode; see rank_candidates for normal mode
+
+    Parameters
+    ----------
+    candidates:             np.ndarray
+                            sorted word bank indices of the possible words
+    prev_guesses:           list
+                            list of previous guesses
+    prev_answers:           list 
+                            list of previous answers
+    memo:                   GuessMemo
+                            in memory cache of earlier decisions, if any
+    store:                  SolverStore
+                            on disk store of earlier decisions, if any
+    info:                   dict
+                            filled with how the decision was made, if given
+    time_budget:            float
+                            seconds to spend scoring, unlimited if not given
+    settings:               dict
+                            solver settings, see SOLVER_SETTINGS
+
+    Returns
+    -------
+    guess:                  str
+                            word with highest entropy
+    """
+    ranked_idx, _ = rank_candidates(candidates, prev_guesses, prev_answers, memo, store, info, time_budget, settings)
+    return WORDBANK.words[ranked_idx[0]]
+
+
+def guess_corpus(candidates, prev_guesses, prev_answers = PREV_ANSWERS, settings = SOLVER_SETTINGS):
+    """
+    This method returns the words that may be guessed next, the candidates
+    in hard mode and the whole word bank in normal mode, without the words
+    already guessed or answered
+
+    Parameters
+    ----------
+    candidates:             np.ndarray
+                            sorted word bank indices of the possible words
+    prev_guesses:           list
+                            list of previous guesses
+    prev_answers:           list 
+                            list of previous answers
+    settings:               dict
+                            solver settings, see SOLVER_SETTINGS
+
+    Returns
+    -------
+    guess_idx:              np.ndarray
+                            word bank indices of the words that may be guessed
+    prefer:                 np.ndarray
+                            in normal mode, which of them could still be the answer,
+                            otherwise None
+    """
+    if settings['corpus'] == 'wordbank':
+        guess_idx = exclude_words(all_candidates(), [*prev_guesses, *prev_answers])
+        return guess_idx, candidate_mask(candidates)[guess_idx]
+    return exclude_words(candidates, [*prev_guesses, *prev_answers]), None
+
+
+def rank_candidates(candidates, prev_guesses, prev_answers = PREV_ANSWERS, memo = None, store = None, info = None, time_budget = None, settings = SOLVER_SETTINGS):
+    """
+    This method ranks guesses by entropy against the remaining candidates
+    In hard mode, corpus 'candidates', only the candidates are guessed,
+    in normal mode, corpus 'wordbank', every word is guessed and ties go
+    to the words that could still be the answer. With the 'lookahead'
+    strategy the top k guesses are re-ranked by the expected number of
+    candidates left after looking ahead, see lookahead.py. States that
+    were already ranked are looked up in the memo, then in the store,
+    before anything is scored. With a time budget the most promising
+    guesses are scored first and the best found when the budget runs
+    out is used; such partial rankings are not cached. With pruning
+    only the guesses that could be the best are scored and ranked
+
+    Parameters
+    ----------
+    candidates:             np.ndarray
+                            sorted word bank indices of the possible words
+    prev_guesses:           list
+                            list of previous guesses
+    prev_answers:           list 
+                            list of previous answers
+    memo:                   GuessMemo
+                            in memory cache of earlier decisions, if any
+    store:                  SolverStore
+                            on disk store of earlier decisions, if any
+    info:                   dict
+                            if given, 'corpus_size' is set to the number of words that may
+                            be guessed, 'guesses_scored' to the number of guesses
+                            scored, 'guesses_pruned' to the number skipped by pruning,
+                            'evaluated' to the fraction of the guesses that were scored,
+                            pruned or cached, 'cache' to 'memo' or 'store' for a
+                            cached decision, 'lookahead_states' to the number of
+                            candidate sets the lookahead solved and 'lookahead_time'
+                            to the seconds it took
+    time_budget:            float
+                            seconds to spend scoring, unlimited if not given
+    settings:               dict
+                            solver settings, see SOLVER_SETTINGS
+
+    Returns
+    -------
+    ranked_idx:             np.ndarray
+                            word bank indices of the guesses from best to worst
+    ranked_scores:          np.ndarray
+                            entropy of each guess in ranked_idx
+    """
+    deadline = perf_counter() + time_budget if time_budget is not None else None
+    guess_idx, prefer = guess_corpus(candidates, prev_guesses, prev_answers, settings)
+    if prefer is not None and len(candidates) == 1 and prefer.any():
+        # every guess scores 0 against a single candidate, so only the candidate itself is worth playing
+        guess_idx, prefer = guess_idx[prefer], None
+    if info is not None:
+        info['corpus_size'] = len(guess_idx)
+        info['guesses_scored'] = 0
+        info['guesses_pruned'] = 0
+        info['evaluated'] = 1.0
+        info['cache'] = None
+        info['lookahead_states'] = 0
+        info['lookahead_time'] = 0.0
+    lookahead = settings['strategy'] == 'lookahead'
+    top_k = settings.get('top_k', TOP_K) if lookahead else 1
+    key = state_key(candidates, guess_idx, settings) if memo is not None or store is not None else None
+    ranked = memo.get(key) if memo is not None else None
+    if ranked is not None:
+        cache = 'memo'
+    elif store is not None:
+        ranked = store.get(key)
+        cache = 'store'
+    if ranked is None:
+        cache = None
+        n_pruned = 0
+        if settings['prune'] and deadline is None:
+            ranked_idx, ranked_scores, prune_stats = rank_guesses_pruned(guess_idx, candidates, top_k, prefer = prefer)
+            evaluated = 1.0
+            n_pruned = prune_stats['pruned']
+        else:
+            ranked_idx, ranked_scores, evaluated = rank_guesses_anytime(guess_idx, candidates, deadline, prefer = prefer)
+        if info is not None:
+            info['guesses_scored'] = len(ranked_idx)
+            info['guesses_pruned'] = n_pruned
+            info['evaluated'] = evaluated
+        if evaluated < 1:
+            return ranked_idx, ranked_scores
+        if lookahead:
+            lookahead_start = perf_counter()
+            ranked_idx, ranked_scores, lookahead_stats = rank_guesses_lookahead(ranked_idx, ranked_scores, candidates, settings['corpus'] == 'candidates',
+                                                                                top_k, settings.get('depth', DEPTH))
+            if info is not None:
+                info['guesses_scored'] += lookahead_stats['guesses_scored']
+                info['lookahead_states'] = lookahead_stats['states']
+                info['lookahead_time'] = perf_counter() - lookahead_start
+        ranked = ranked_idx, ranked_scores
+        if store is not None:
+            store.put(key, ranked)
+    if memo is not None and cache != 'memo':
+        memo.put(key, ranked)
+    if info is not None:
+        info['cache'] = cache
+    return ranked
 
 
 def check_guess(guess, answer):
@@ -69,8 +279,8 @@ def check_guess(guess, answer):
 
     Returns
     -------
-    evaluation: list
-                list of all evaluations
+    code:       int
+                pattern code of the evaluation, see feedback.encode_pattern
     """
     def remove_correct(evaluation, word):
         """This method removes all the correct letters from the answer"""
@@ -105,10 +315,10 @@ def check_guess(guess, answer):
                 evaluation[i] = "absent"
 
     sorted_eval = dict(sorted(list(evaluation.items()), key = lambda x: x[0]))
-    return list(sorted_eval.values())
+    return encode_pattern(sorted_eval.values())
 
 
-def find_poss_words(guess, guess_results, poss_words, prev_answers = PREV_ANSWERS):
+def find_poss_words(guess, code, poss_words, prev_answers = PREV_ANSWERS):
     """
     This method creates a new list of possible words to pick from
     based on the what the previous guess and evaluations were
@@ -117,22 +327,29 @@ def find_poss_words(guess, guess_results, poss_words, prev_answers = PREV_ANSWER
     ----------
     guess:                  str
                             previous guess
-    guess_results:          list
-                            list of evaluation results from previous guess
+    code:                   int
+                            pattern code of the evaluation of the previous guess
 
     Returns
     -------
     new_poss_words:         list
                             list of possible words
     """
+    poss_words = list(poss_words)
+    word_index = WORDBANK.index
+    if guess in word_index and all(word in word_index for word in poss_words):
+        candidates = filter_candidates(guess, code, np.sort(word_indices(poss_words)))
+        return candidate_words(exclude_words(candidates, [guess, *prev_answers]))
+    constraints = Constraints(poss_words)
+    constraints.add(guess, code)
     new_poss_words = []
-    for word in poss_words:
-        if word != guess and word_matches_guess(word, guess, guess_results) and word not in prev_answers:
+    for word in constraints.candidate_words():
+        if word != guess and word not in prev_answers:
             new_poss_words.append(word)
     return sorted(new_poss_words)
 
 
-def word_matches_guess(word, guess, guess_results):
+def word_matches_guess(word, guess, code):
     """
     This method checks if a word matches an evaluation
 
@@ -142,8 +359,8 @@ def word_matches_guess(word, guess, guess_results):
                     word that is being checked
     guess:          str
                     previous guess
-    guess_results   list
-                    list of evaluation results from previous guess
+    code:           int
+                    pattern code of the evaluation of the previous guess
 
     Returns
     -------
@@ -162,7 +379,7 @@ def word_matches_guess(word, guess, guess_results):
     correct = {}
     present = {}
     absent = []
-    for i, (letter, evaluation) in enumerate(zip(guess, guess_results)):
+    for i, (letter, evaluation) in enumerate(zip(guess, decode_pattern(code))):
         if evaluation == 'correct':
             correct[i] = letter
         elif evaluation == 'present':
@@ -196,50 +413,18 @@ def word_matches_guess(word, guess, guess_results):
 
 
 
-def get_entropy(entropy_dict, poss_words):
-        """
-        This method calculates the entropy for a given word
-        Entropy is calculated by the product of two parts
-        p: which is the number of words possible with given outcome / total number of possible words
-        log2(1/p):  represents how much information is cut out
-        You then take the running sum of each outcome of p*log2(1/p)
-        
-        Parameters
-        ----------
-        entropy_dict:   dict
-                        dictionary of {possible outcome : [list of words that fit outcome]}
-        poss_words:     list
-                        list of possible words
-
-        Returns
-        -------
-        entropy:        int
-                        entropy value 
-        """
-        entropy = 0
-        for guess in entropy_dict:
-            num_words = len(entropy_dict[guess])
-            p = num_words / len(poss_words)
-            entropy += p * np.log2(1/p)
-        return entropy
-
-
-def guessed_word(guess_results):
+def guessed_word(code):
         """
         This method checks if a word has been guessed
-        It looks through a list of evaluation tiles and
-        if they are all green, it returns true
+        i.e. if every tile of its pattern code is green
 
         Parameters
         ----------
-        guess_results:  list
-                        list of evalution tiles ("correct", "present", or "absent")
+        code:           int
+                        pattern code of the evaluation
 
         Returns
         -------
         bool:           true if tiles are correct, otherwise false
         """
-        for evaluation in guess_results:
-            if evaluation != "correct":
-                return False
-        return True
\ No newline at end of file
+        return code == ALL_CORRECT
\ No newline at end of file
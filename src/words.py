@@ -1,3 +1,12 @@
+import os
+import hashlib
+import threading
+import numpy as np
+from collections.abc import Set
+
+CACHE_DIR = "cache"
+
+
 def read_file(filename):
 	file = open(filename)
 	content = []
@@ -6,6 +15,150 @@ def read_file(filename):
 	return set(content)
 
 
-WORDBANK = read_file("wordbank.txt")
-PREV_ANSWERS = read_file("prev_answers.txt")
-POSS_ANSWERS = read_file("poss_answers.txt")
\ No newline at end of file
+def file_hash(filename):
+	"""This method returns a short hash of a file's contents"""
+	with open(filename, 'rb') as file:
+		return hashlib.sha1(file.read()).hexdigest()[:16]
+
+
+def write_atomic(filename, contents):
+	"""
+	This method replaces a file with new contents, so a crash leaves either
+	the old or the new file. Every thread writes its own temporary file, so
+	threads writing the same file at once each replace it whole
+
+	Parameters
+	----------
+	filename:	str
+				file to write
+	contents:	object
+				text, bytes, or an array saved in the .npy format
+	"""
+	tmp_filename = f"{filename}.{os.getpid()}.{threading.get_ident()}.tmp"
+	with open(tmp_filename, 'wb') as outfile:
+		if isinstance(contents, np.ndarray):
+			np.save(outfile, contents)
+		else:
+			outfile.write(contents.encode("utf-8") if isinstance(contents, str) else contents)
+		outfile.flush()
+		os.fsync(outfile.fileno())
+	os.replace(tmp_filename, filename)
+
+
+def letters_to_words(letters):
+	"""This method turns an N x 5 array of letters, where a is 0, back into a list of words"""
+	text = (np.asarray(letters, dtype = np.uint8) + ord('a')).tobytes().decode('ascii')
+	return [text[i:i + 5] for i in range(0, len(text), 5)]
+
+
+def is_word(word):
+	"""This method returns true for a five letter lowercase word, the words that can be guessed whether or not they are in the word bank"""
+	return isinstance(word, str) and len(word) == 5 and word.isascii() and word.isalpha() and word.islower()
+
+
+def words_to_letters(words):
+	"""This method turns a list of words into an N x 5 uint8 array of letters, where a is 0"""
+	letters = np.frombuffer("".join(words).encode('ascii'), dtype = np.uint8) - ord('a')
+	return letters.reshape(len(words), 5)
+
+
+class WordList(Set):
+	"""
+	This class is a word list read from a text file. It behaves like
+	the set of its words, and also gives them as a sorted list and as
+	an N x 5 array of letters in the same order. The array is cached
+	in a binary file that is memory mapped when the list is created
+	and rebuilt whenever the text file changes; the list, set and
+	index views are only built the first time they are used
+	"""
+	def __init__(self, filename, cache_dir = CACHE_DIR):
+		self.filename = filename
+		self.cache_dir = cache_dir
+		self._letters = self._load()
+		self._words = None
+		self._set = None
+		self._index = None
+
+	def _cache_filename(self, digest):
+		"""This method returns the binary cache file of a version of the text file"""
+		name = os.path.splitext(os.path.basename(self.filename))[0]
+		return os.path.join(self.cache_dir, f"words_{name}_{digest}.npy")
+
+	def _load(self):
+		"""
+		This method memory maps the binary cache of the text file, building
+		it first if it is missing or was built from a different version of
+		the file. Caches of other versions are deleted
+
+		Returns
+		-------
+		letters:	np.ndarray
+					N x 5 uint8 array of the sorted words
+		"""
+		cache_file = self._cache_filename(file_hash(self.filename))
+		if os.path.exists(cache_file):
+			return np.load(cache_file, mmap_mode = 'r')
+		os.makedirs(self.cache_dir, exist_ok = True)
+		name = os.path.splitext(os.path.basename(self.filename))[0]
+		for stale in os.listdir(self.cache_dir):
+			if stale.startswith(f"words_{name}_") and stale.endswith(".npy"):
+				os.remove(os.path.join(self.cache_dir, stale))
+		write_atomic(cache_file, words_to_letters(sorted(word for word in read_file(self.filename) if word)))
+		return np.load(cache_file, mmap_mode = 'r')
+
+	@property
+	def letters(self):
+		"""This method returns the N x 5 uint8 letter array of the words in sorted order"""
+		return self._letters
+
+	@property
+	def words(self):
+		"""This method returns the words as a sorted list"""
+		if self._words is None:
+			self._words = letters_to_words(self._letters)
+		return self._words
+
+	@property
+	def set(self):
+		"""This method returns the words as a set"""
+		if self._set is None:
+			self._set = set(self.words)
+		return self._set
+
+	@property
+	def index(self):
+		"""This method returns a dict from each word to its position in the sorted list"""
+		if self._index is None:
+			self._index = {word : i for i, word in enumerate(self.words)}
+		return self._index
+
+	def add(self, word):
+		"""This method adds a word, i.e. a new previous answer, to the list in memory"""
+		if word in self.set:
+			return
+		self._words = sorted([*self.words, word])
+		self._letters = words_to_letters(self._words)
+		self._set.add(word)
+		self._index = None
+
+	@classmethod
+	def _from_iterable(cls, iterable):
+		# set operations like & and - give plain sets
+		return set(iterable)
+
+	def __contains__(self, word):
+		return word in self.set
+
+	def __iter__(self):
+		return iter(self.words)
+
+	def __len__(self):
+		return len(self._letters)
+
+	def __repr__(self):
+		return f"WordList({self.filename!r}, {len(self)} words)"
+
+
+WORDBANK = WordList("wordbank.txt")
+PREV_ANSWERS = WordList("prev_answers.txt")
+POSS_ANSWERS = WordList("poss_answers.txt")